@@ -0,0 +1,3 @@
+#!/bin/sh
+
+pypy3 manage.py run_round_scheduler
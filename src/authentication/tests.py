@@ -1,3 +1,74 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.authtoken.models import Token
+
+from authentication.models import UserProfile
+from authentication.utils import get_user_from_token
+from witswin.middleware import BasicTokenHeaderAuthentication
+
+
+class TokenCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("test_user")
+        self.profile = UserProfile.objects.create(
+            user=self.user, wallet_address="0x623123123", username="test_user"
+        )
+        self.token = Token.objects.create(user=self.user)
+
+    def test_token_resolved_from_cache(self):
+        with self.assertNumQueries(1):
+            get_user_from_token(self.token.key)
+
+        with self.assertNumQueries(0):
+            user = get_user_from_token(self.token.key)
+
+            self.assertEqual(user.pk, self.user.pk)  # type: ignore
+            self.assertEqual(user.profile.pk, self.profile.pk)  # type: ignore
+            self.assertEqual(user.profile.wallet_address, "0x623123123")  # type: ignore
+
+        self.assertEqual(user.profile.username, "test_user", "Loaded on access")  # type: ignore
+
+    def test_rotated_token_invalidated(self):
+        key = self.token.key
+        get_user_from_token(key)
+
+        self.token.delete()
+        new_token = Token.objects.create(user=self.user)
+
+        self.assertIsNone(get_user_from_token(key))
+        self.assertEqual(get_user_from_token(new_token.key).pk, self.user.pk)  # type: ignore
+
+    def test_rest_api_authenticated_with_cached_token(self):
+        headers = {"Authorization": f"TOKEN {self.token.key}"}
+
+        res = self.client.get("/auth/info/", headers=headers)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["username"], "test_user")
+
+        res = self.client.get("/auth/info/", headers={"Authorization": "TOKEN 0x"})
+
+        self.assertEqual(res.status_code, 401)
+
+    async def test_websocket_token_read_among_query_params(self):
+        scopes = []
+
+        async def app(scope, receive, send):
+            scopes.append(scope)
+
+        async def get_user(token):
+            return token
+
+        scope = {
+            "headers": [(b"cookie", b"theme=dark")],
+            "query_string": f"auth={self.token.key}&seq=5".encode(),
+        }
+
+        with mock.patch("witswin.middleware.get_user_from_basic_auth", get_user):
+            await BasicTokenHeaderAuthentication(app)(scope, None, None)
 
-# Create your tests here.
+        self.assertEqual(scopes[0]["user"], self.token.key)
@@ -0,0 +1,83 @@
+"""
+Cached token resolver shared by the websocket middleware and the REST API.
+
+A token is resolved to the ids and wallet of its user and profile once, the
+user and profile are then rebuilt from the cache with their other fields
+deferred, so authenticating a connection does not touch the database.
+"""
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.authtoken.models import Token
+
+from authentication.models import UserProfile
+
+
+def auth_token_key(key: str):
+    return f"auth_token_{key}"
+
+
+def load_token_identity(key: str) -> dict:
+    token = Token.objects.select_related("user__profile").filter(key=key).first()
+
+    # unknown tokens are cached as well, the entry is dropped once it is created
+    if token is None:
+        return {}
+
+    profile = getattr(token.user, "profile", None)
+
+    return {
+        "user_id": token.user_id,  # type: ignore
+        "is_active": token.user.is_active,
+        "profile_id": profile.pk if profile else None,
+        "wallet_address": profile.wallet_address if profile else None,
+    }
+
+
+def build_user(identity: dict) -> User:
+    user = User.from_db(
+        None, ["id", "is_active"], [identity["user_id"], identity["is_active"]]
+    )
+
+    if identity["profile_id"] is None:
+        # hasattr(user, "profile") is False without a query
+        User.profile.related.set_cached_value(user, None)  # type: ignore
+        return user
+
+    # values follow the order of the model fields
+    user.profile = UserProfile.from_db(
+        None,
+        ["id", "wallet_address", "user_id"],
+        [identity["profile_id"], identity["wallet_address"], identity["user_id"]],
+    )
+
+    return user
+
+
+def get_user_from_token(key: str) -> User | None:
+    identity = cache.get(auth_token_key(key))
+
+    if identity is None:
+        identity = load_token_identity(key)
+        cache.set(auth_token_key(key), identity, settings.AUTH_TOKEN_CACHE_SECONDS)
+
+    if not identity:
+        return None
+
+    return build_user(identity)
+
+
+def invalidate_token(key: str):
+    cache.delete(auth_token_key(key))
+
+
+def invalidate_user_tokens(user_id: int):
+    cache.delete_many(
+        [
+            auth_token_key(key)
+            for key in Token.objects.filter(user_id=user_id).values_list(
+                "key", flat=True
+            )
+        ]
+    )
@@ -27,7 +27,8 @@ class GetProfileView(RetrieveUpdateAPIView):
         return self.queryset.filter(user=self.request.user)
 
     def get_object(self):
-        return self.request.user.profile # type: ignore
+        # the authenticated user only carries the cached profile ids
+        return self.get_queryset().get()
     
 
 class AuthenticateView(CreateAPIView):
@@ -0,0 +1,59 @@
+"""
+Thread pool running the sync work left in the websocket consumers.
+
+``database_sync_to_async`` runs everything in the single thread sensitive
+thread by default, so the consumers of a node queue behind each other. This
+pool is sized with ``SYNC_EXECUTOR_WORKERS`` and records how long each call
+waited for a thread and how long it ran, buffered in memory so the calls
+don't wait for redis.
+"""
+
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from channels.db import database_sync_to_async
+from django.conf import settings
+
+from core.metrics import BufferedHistograms
+
+
+class InstrumentedThreadPoolExecutor(ThreadPoolExecutor):
+    def __init__(self, name: str, max_workers: int):
+        super().__init__(max_workers=max_workers, thread_name_prefix=name)
+        self.name = name
+        self.timings = BufferedHistograms(settings.EXECUTOR_METRICS_FLUSH_SECONDS)
+
+    def submit(self, fn, /, *args, **kwargs):
+        queued_at = time.monotonic()
+
+        def run():
+            started_at = time.monotonic()
+
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                finished_at = time.monotonic()
+
+                self.timings.observe(
+                    f"executor_{self.name}_wait_ms", (started_at - queued_at) * 1000
+                )
+                self.timings.observe(
+                    f"executor_{self.name}_run_ms", (finished_at - started_at) * 1000
+                )
+
+        return super().submit(run)
+
+
+sync_executor = InstrumentedThreadPoolExecutor(
+    "consumers", settings.SYNC_EXECUTOR_WORKERS
+)
+
+
+def run_in_sync_executor(func):
+    """
+    ``database_sync_to_async`` on the instrumented pool instead of the thread
+    sensitive thread, usable as a decorator.
+    """
+    return database_sync_to_async(
+        func, thread_sensitive=False, executor=sync_executor
+    )
@@ -0,0 +1,147 @@
+"""
+Bucketed histograms and counters kept in redis hashes, shared by every
+process.
+"""
+
+import threading
+import time
+
+from collections import Counter, defaultdict
+
+from core.utils import get_async_redis_client, get_redis_client
+
+
+DEFAULT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+METRICS_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def histogram_key(name: str):
+    return f"metrics_{name}"
+
+
+def get_bucket(value: float, buckets=DEFAULT_BUCKETS):
+    for bucket in buckets:
+        if value <= bucket:
+            return str(bucket)
+
+    return "+Inf"
+
+
+def add_observation(pipe, name: str, value: float, buckets):
+    key = histogram_key(name)
+
+    pipe.hincrby(key, get_bucket(value, buckets), 1)
+    pipe.hincrby(key, "count", 1)
+    pipe.hincrbyfloat(key, "sum", value)
+    pipe.expire(key, METRICS_TIMEOUT)
+
+
+def observe(name: str, value: float, buckets=DEFAULT_BUCKETS):
+    with get_redis_client().pipeline(transaction=False) as pipe:
+        add_observation(pipe, name, value, buckets)
+        pipe.execute()
+
+
+async def aobserve(name: str, value: float, buckets=DEFAULT_BUCKETS):
+    async with get_async_redis_client().pipeline(transaction=False) as pipe:
+        add_observation(pipe, name, value, buckets)
+        await pipe.execute()
+
+
+def get_histogram(name: str) -> dict[str, float]:
+    return {
+        key.decode(): float(value)
+        for key, value in get_redis_client().hgetall(histogram_key(name)).items()
+    }
+
+
+class BufferedCounters:
+    """
+    Counters summed in memory and added to their redis hash at most once
+    every ``interval`` seconds, for the ones incremented on every websocket
+    frame.
+    """
+
+    def __init__(self, name: str, interval: float):
+        self.key = histogram_key(name)
+        self.interval = interval
+        self.pending = Counter()
+        self.flushed_at = time.monotonic()
+
+    def incr(self, field: str, amount: int = 1):
+        self.pending[field] += amount
+
+    async def aflush(self, force: bool = False):
+        if not self.pending:
+            return
+
+        if not force and time.monotonic() - self.flushed_at < self.interval:
+            return
+
+        pending, self.pending = self.pending, Counter()
+        self.flushed_at = time.monotonic()
+
+        async with get_async_redis_client().pipeline(transaction=False) as pipe:
+            for field, amount in pending.items():
+                pipe.hincrby(self.key, field, amount)
+
+            pipe.expire(self.key, METRICS_TIMEOUT)
+            await pipe.execute()
+
+
+class BufferedHistograms:
+    """
+    Observations summed in memory per histogram and bucket, added to their
+    redis hashes at most once every ``interval`` seconds by the thread that
+    observes when it's due. For the ones recorded on every executor call,
+    safe to share between threads.
+    """
+
+    def __init__(self, interval: float, buckets=DEFAULT_BUCKETS):
+        self.interval = interval
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.pending: defaultdict[str, Counter] = defaultdict(Counter)
+        self.flushed_at = time.monotonic()
+
+    def observe(self, name: str, value: float):
+        with self.lock:
+            fields = self.pending[name]
+            fields[get_bucket(value, self.buckets)] += 1
+            fields["count"] += 1
+            fields["sum"] += value
+
+            if time.monotonic() - self.flushed_at < self.interval:
+                return
+
+        self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, defaultdict(Counter)
+            self.flushed_at = time.monotonic()
+
+        if not pending:
+            return
+
+        with get_redis_client().pipeline(transaction=False) as pipe:
+            for name, fields in pending.items():
+                key = histogram_key(name)
+
+                for field, amount in fields.items():
+                    if field == "sum":
+                        pipe.hincrbyfloat(key, field, amount)
+                    else:
+                        pipe.hincrby(key, field, amount)
+
+                pipe.expire(key, METRICS_TIMEOUT)
+
+            pipe.execute()
+
+
+def get_counters(name: str) -> dict[str, int]:
+    return {
+        key.decode(): int(value)
+        for key, value in get_redis_client().hgetall(histogram_key(name)).items()
+    }
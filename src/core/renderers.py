@@ -0,0 +1,127 @@
+"""
+camelCase JSON renderer encoding with orjson.
+
+Our payloads use a small fixed set of keys, so their camelCase form is
+memoized instead of running the regex on every key of every message. Types
+orjson doesn't encode the way DRF does (decimals, datetimes, lazy strings...)
+go through the DRF encoder. orjson doesn't build on PyPy, there the
+stdlib ``json`` encodes the same output.
+
+Websocket clients can opt into the same messages encoded with MessagePack.
+"""
+
+import json
+
+from functools import lru_cache
+
+import msgpack
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from djangorestframework_camel_case.util import camelize_re, underscore_to_camel
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    loads = orjson.loads
+else:
+    loads = json.loads
+
+MSGPACK_SUBPROTOCOL = "msgpack"
+
+_encoder = JSONEncoder()
+
+
+@lru_cache(maxsize=4096)
+def camelize_key(key: str) -> str:
+    if "_" not in key:
+        return key
+
+    return camelize_re.sub(underscore_to_camel, key)
+
+
+def camelize(data):
+    if isinstance(data, dict):
+        return {
+            camelize_key(key) if isinstance(key, str) else key: camelize(value)
+            for key, value in data.items()
+        }
+
+    if isinstance(data, (list, tuple)):
+        return [camelize(item) for item in data]
+
+    return data
+
+
+def dumps(data, indent: bool = False) -> bytes:
+    if orjson is None:
+        return json.dumps(
+            camelize(data),
+            default=_encoder.default,
+            ensure_ascii=False,
+            indent=2 if indent else None,
+            separators=(",", ": ") if indent else (",", ":"),
+        ).encode("utf-8")
+
+    options = ORJSON_OPTIONS | orjson.OPT_INDENT_2 if indent else ORJSON_OPTIONS
+
+    return orjson.dumps(camelize(data), default=_encoder.default, option=options)
+
+
+def render_camel_json(data) -> str:
+    return dumps(data).decode("utf-8")
+
+
+def render_camel_msgpack(data) -> bytes:
+    return msgpack.packb(camelize(data), default=_encoder.default)
+
+
+@lru_cache(maxsize=1024)
+def json_to_msgpack(text: str) -> bytes:
+    """
+    MessagePack form of a pre-rendered message, memoized as the same
+    payloads are sent to every socket.
+    """
+    return msgpack.packb(loads(text))
+
+
+@lru_cache(maxsize=1024)
+def describe_rendered(text: str) -> tuple[str | None, int]:
+    """
+    Type and encoded size of a pre-rendered message, for the metrics.
+    """
+    return loads(text).get("type"), len(text.encode("utf-8"))
+
+
+def stamp_msgpack(data: bytes, key: str, value) -> bytes:
+    """
+    Adds ``key`` first to an encoded map without decoding the rest of it.
+    """
+    # fixmap header, the size is in the low 4 bits
+    if data[0] & 0xF0 == 0x80 and data[0] < 0x8F:
+        return bytes([data[0] + 1]) + msgpack.packb(key) + msgpack.packb(value) + data[1:]
+
+    return msgpack.packb({key: value, **msgpack.unpackb(data)})
+
+
+class CamelCaseORJSONRenderer(JSONRenderer):
+    """
+    Drop in replacement of ``CamelCaseJSONRenderer``.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        ret = dumps(data, bool(indent))
+
+        # same as the DRF renderer, keeps the output valid inside javascript
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
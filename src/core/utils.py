@@ -1,9 +1,16 @@
+import asyncio
 import logging
 import os
+import pickle
 import time
 import uuid
+import weakref
+
+import redis
+import redis.asyncio
 
 from contextlib import contextmanager
+from django.conf import settings
 from django.utils.timezone import datetime
 from django.core.cache import cache
 
@@ -25,4 +32,116 @@ def memcache_lock(lock_id, oid, lock_expire=60):
             cache.delete(lock_id)
 
 
+# the owner check and the new expiry in one step, a lock that expired and
+# was acquired by someone else in between is never extended
+RENEW_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("expire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+def renew_lock(lock_id, oid, lock_expire=60):
+    """
+    Extends a lock acquired with ``memcache_lock`` as long as it is still
+    owned by ``oid``.
+    """
+    return bool(
+        get_redis_client().eval(
+            RENEW_LOCK_SCRIPT,
+            1,
+            cache.make_and_validate_key(lock_id),
+            dump_cache_value(oid),
+            int(lock_expire),
+        )
+    )
+
+
+def dump_cache_value(value):
+    """
+    The form ``RedisCache`` stores a value in, integers are kept as they are
+    so ``incr`` works on them and everything else is pickled.
+    """
+    if type(value) is int:
+        return value
+
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def load_cache_value(data: bytes):
+    try:
+        return int(data)
+    except ValueError:
+        return pickle.loads(data)
+
+
+def fencing_token_key(lock_id):
+    return f"{lock_id}_fencing_token"
+
+
+def next_fencing_token(lock_id) -> int:
+    """
+    Returns a token greater than all the previous ones, handed to each new
+    owner of the lock so the work of a stale owner can be told apart.
+    """
+    cache.add(fencing_token_key(lock_id), 0, None)
+
+    return cache.incr(fencing_token_key(lock_id))
+
+
+def get_fencing_token(lock_id) -> int:
+    return cache.get(fencing_token_key(lock_id), 0)
+
+
+_redis_client: redis.Redis | None = None
+_async_redis_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_redis_client() -> redis.Redis:
+    global _redis_client
+
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(settings.REDIS_URL)
+
+    return _redis_client
+
+
+def get_async_redis_client() -> redis.asyncio.Redis:
+    # asyncio connections are bound to the loop they were created in
+    loop = asyncio.get_running_loop()
+    client = _async_redis_clients.get(loop)
+
+    if client is None:
+        # concurrent commands wait for a free connection instead of opening
+        # one per socket under a broadcast
+        client = redis.asyncio.Redis(
+            connection_pool=redis.asyncio.BlockingConnectionPool.from_url(
+                settings.REDIS_URL,
+                max_connections=settings.ASYNC_REDIS_MAX_CONNECTIONS,
+                timeout=None,
+            )
+        )
+        _async_redis_clients[loop] = client
+
+    return client
+
+
+async def acache_get_many(keys: list[str]) -> dict:
+    """
+    ``cache.get_many`` of the redis cache through the asyncio client of the
+    loop, so reading the cache doesn't wait for a thread.
+    """
+    values = await get_async_redis_client().mget(
+        [cache.make_and_validate_key(key) for key in keys]
+    )
+
+    return {
+        key: load_cache_value(value)
+        for key, value in zip(keys, values)
+        if value is not None
+    }
+
 
+async def acache_get(key: str, default=None):
+    return (await acache_get_many([key])).get(key, default)
@@ -0,0 +1,197 @@
+"""
+Cached answer key of a competition.
+
+Built once before the competition starts so answers and hints can be
+validated without touching the database while every player is answering.
+"""
+
+import time
+
+from django.core.cache import cache
+
+from quiz.clock import get_round_clock
+from quiz.models import Choice, Competition, UserAnswer, UserCompetition
+from quiz.serializers import serialize_user_competition
+from quiz.utils import get_quiz_question_state, is_answer_revealed
+
+
+ANSWER_KEY_TIMEOUT = 60 * 60 * 24
+
+# the answer key of a running competition doesn't change, processes keep the
+# one they read for a few seconds instead of reading it on every answer
+LOCAL_ANSWER_KEY_SECONDS = 5
+
+_local_answer_keys: dict[int, tuple[float, dict]] = {}
+
+
+class AnswerRejected(Exception):
+    pass
+
+
+def answer_key_cache_key(competition_pk: int):
+    return f"quiz_{competition_pk}_answer_key"
+
+
+def build_answer_key(competition: Competition | int) -> dict:
+    """
+    Maps each question id to its number, choices, correct choice, hinted
+    choices and answer window.
+    """
+    competition_pk = getattr(competition, "pk", competition)
+    answer_key = {}
+
+    choices = Choice.objects.filter(question__competition_id=competition_pk).values_list(
+        "pk",
+        "text",
+        "is_correct",
+        "is_hinted_choice",
+        "question_id",
+        "question__number",
+        "question__competition__start_at",
+        "question__competition__question_count",
+    )
+
+    for (
+        pk,
+        text,
+        is_correct,
+        is_hinted,
+        question_id,
+        question_number,
+        start_at,
+        question_count,
+    ) in choices:
+        if question_id not in answer_key:
+            clock = get_round_clock(start_at, question_count)
+            answer_key[question_id] = {
+                "number": question_number,
+                "choices": {},
+                "correct_choice": None,
+                "hinted_choices": [],
+                "opens_at": clock.round_start(question_number).timestamp(),
+                # the correct choice is revealed at ``reveal_at``, answers
+                # after that would be made knowing it
+                "deadline": clock.reveal_at(question_number).timestamp(),
+            }
+
+        question = answer_key[question_id]
+        question["choices"][pk] = text
+
+        if is_correct:
+            question["correct_choice"] = pk
+
+        if is_hinted:
+            question["hinted_choices"].append(pk)
+
+    cache.set(answer_key_cache_key(competition_pk), answer_key, ANSWER_KEY_TIMEOUT)
+    _local_answer_keys[competition_pk] = (time.monotonic(), answer_key)
+
+    return answer_key
+
+
+def get_answer_key(competition_pk: int) -> dict:
+    local = _local_answer_keys.get(competition_pk)
+
+    if local is not None and time.monotonic() - local[0] < LOCAL_ANSWER_KEY_SECONDS:
+        return local[1]
+
+    answer_key = cache.get(answer_key_cache_key(competition_pk))
+
+    if answer_key is None:
+        return build_answer_key(competition_pk)
+
+    _local_answer_keys[competition_pk] = (time.monotonic(), answer_key)
+
+    return answer_key
+
+
+def invalidate_answer_key(competition_pk: int):
+    _local_answer_keys.pop(competition_pk, None)
+    cache.delete(answer_key_cache_key(competition_pk))
+
+
+def get_open_question(competition: Competition, question_id: int) -> dict:
+    """
+    Answer key entry of a question that is shown and still accepts answers
+    and hints, from the moment it's shown until its correct choice is
+    revealed.
+    """
+    question = get_answer_key(competition.pk).get(question_id)
+
+    if question is None:
+        raise AnswerRejected("question does not belong to the competition")
+
+    now = time.time()
+
+    if now < question["opens_at"]:
+        raise AnswerRejected("question is not shown yet")
+
+    if now > question["deadline"]:
+        raise AnswerRejected("correct choice of the question is revealed")
+
+    return question
+
+
+def get_answers_history(
+    competition: Competition,
+    user_competition: UserCompetition | None,
+    user_competition_data: dict | None = None,
+) -> list[dict]:
+    """
+    The answers of the participant in question order, the questions shown
+    before the current one without an answer are listed as missed. Only the
+    recorded choices are queried, the rest comes from the answer key and
+    ``user_competition_data``, the serialized participant.
+    """
+    if user_competition_data is None:
+        user_competition_data = serialize_user_competition(user_competition)
+
+    answer_key = get_answer_key(competition.pk)
+    state = get_quiz_question_state(competition)
+
+    answers = {}
+
+    if user_competition:
+        answers = {
+            question_id: (pk, selected_choice_id)
+            for pk, question_id, selected_choice_id in UserAnswer.objects.filter(
+                user_competition=user_competition
+            ).values_list("pk", "question_id", "selected_choice_id")
+        }
+
+    history = []
+
+    for question_id, question in sorted(
+        answer_key.items(), key=lambda item: item[1]["number"]
+    ):
+        answer = answers.get(question_id)
+
+        if answer is None and question["number"] >= state:
+            continue
+
+        entry = {
+            "id": -1,
+            "user_competition": user_competition_data,
+            "question": question_id,
+            "selected_choice": {"is_correct": False, "id": None},
+        }
+
+        if answer is not None:
+            pk, selected_choice_id = answer
+            is_correct = selected_choice_id == question["correct_choice"]
+
+            entry["id"] = pk
+            entry["selected_choice"] = {
+                "id": selected_choice_id,
+                "text": question["choices"].get(selected_choice_id),
+                "is_correct": (
+                    is_correct
+                    if is_answer_revealed(competition, question["number"])
+                    else None
+                ),
+                "question": question_id,
+            }
+
+        history.append(entry)
+
+    return history
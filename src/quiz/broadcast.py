@@ -0,0 +1,125 @@
+"""
+Node-local broadcast hub of the competition groups.
+
+A channel layer ``group_send`` writes one message per socket of the group into
+redis. With ``QUIZ_BROADCAST_MODE = "hub"`` the round driver publishes each
+event once to a redis pub/sub channel of the competition instead, every process
+subscribes once per competition its sockets are in and hands the events to its
+own consumers in memory, so an event costs one redis write per node.
+"""
+
+import asyncio
+import json
+import logging
+import weakref
+
+from collections import defaultdict
+from django.conf import settings
+
+from core.utils import get_async_redis_client
+
+
+logger = logging.getLogger(__name__)
+
+
+def is_broadcast_hub_enabled():
+    return settings.QUIZ_BROADCAST_MODE == "hub"
+
+
+def broadcast_channel_name(group_name: str):
+    return f"broadcast_{group_name}"
+
+
+async def broadcast(channel_layer, group_name: str, event: dict):
+    if not is_broadcast_hub_enabled():
+        await channel_layer.group_send(group_name, event)
+        return
+
+    await get_async_redis_client().publish(
+        broadcast_channel_name(group_name), json.dumps(event)
+    )
+
+
+class BroadcastHub:
+    def __init__(self):
+        self.groups: dict[str, set] = defaultdict(set)
+        self.pubsub = get_async_redis_client().pubsub()
+        self.lock = asyncio.Lock()
+        self.reader: asyncio.Task | None = None
+
+    async def join(self, group_name: str, consumer):
+        async with self.lock:
+            if not self.groups[group_name]:
+                await self.pubsub.subscribe(broadcast_channel_name(group_name))
+
+            self.groups[group_name].add(consumer)
+
+            if self.reader is None or self.reader.done():
+                self.reader = asyncio.create_task(self.read())
+
+    async def leave(self, group_name: str, consumer):
+        async with self.lock:
+            consumers = self.groups.get(group_name)
+
+            if not consumers:
+                return
+
+            consumers.discard(consumer)
+
+            if not consumers:
+                del self.groups[group_name]
+                await self.pubsub.unsubscribe(broadcast_channel_name(group_name))
+
+    async def read(self):
+        while True:
+            try:
+                message = await self.pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # the pubsub connection subscribes again once it reconnects
+                logger.exception("broadcast hub failed to read from redis")
+                await asyncio.sleep(1)
+                continue
+
+            if message is None:
+                continue
+
+            group_name = message["channel"].decode().removeprefix("broadcast_")
+
+            await self.fan_out(group_name, json.loads(message["data"]))
+
+    async def fan_out(self, group_name: str, event: dict):
+        consumers = list(self.groups.get(group_name, ()))
+
+        results = await asyncio.gather(
+            *(consumer.dispatch(event) for consumer in consumers),
+            return_exceptions=True,
+        )
+
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"failed to dispatch {event['type']}: {result}")
+
+    async def close(self):
+        if self.reader:
+            self.reader.cancel()
+
+        self.groups.clear()
+        await self.pubsub.reset()
+
+
+_broadcast_hubs = weakref.WeakKeyDictionary()
+
+
+def get_broadcast_hub() -> BroadcastHub:
+    loop = asyncio.get_running_loop()
+    hub = _broadcast_hubs.get(loop)
+
+    if hub is None:
+        hub = BroadcastHub()
+        _broadcast_hubs[loop] = hub
+
+    return hub
@@ -0,0 +1,76 @@
+"""
+Progress checkpoints of the round drivers.
+
+Every step a driver completes (question published, round stats published,
+winners calculated, payout submitted...) is added to a redis set so a driver
+started after a crash, on any node, resumes the competition at the right
+round without sending the delivered events again.
+
+Only the driver holding the lease of a competition runs it, each new holder
+gets a greater fencing token which is attached to its events and payout.
+"""
+
+from core.utils import get_async_redis_client, get_redis_client
+
+
+CHECKPOINT_TIMEOUT = 60 * 60 * 24
+
+CANCELLED = "cancelled"
+# marked as soon as a driver holds the lease, before the warm up
+CLAIMED = "claimed"
+FINISHED = "finished"
+
+
+class StaleFencingToken(Exception):
+    pass
+
+
+def round_driver_lease_key(competition_pk: int):
+    return f"quiz_{competition_pk}_round_driver_lease"
+
+
+def checkpoint_key(competition_pk: int):
+    return f"quiz_{competition_pk}_checkpoint"
+
+
+class RoundCheckpoint:
+    def __init__(self, competition_pk: int):
+        self.competition_pk = competition_pk
+        self.key = checkpoint_key(competition_pk)
+        self.steps: set[str] = set()
+
+    async def load(self):
+        self.steps = {
+            step.decode() for step in await get_async_redis_client().smembers(self.key)  # type: ignore
+        }
+
+        return self
+
+    def is_done(self, step: str):
+        return step in self.steps
+
+    @property
+    def is_started(self):
+        return bool(self.steps - {CANCELLED})
+
+    @property
+    def is_finished(self):
+        return FINISHED in self.steps
+
+    async def mark(self, step: str):
+        self.steps.add(step)
+
+        async with get_async_redis_client().pipeline() as pipe:
+            pipe.sadd(self.key, step)
+            pipe.expire(self.key, CHECKPOINT_TIMEOUT)
+            await pipe.execute()
+
+    async def is_cancelled(self):
+        return bool(await get_async_redis_client().sismember(self.key, CANCELLED))  # type: ignore
+
+
+def cancel_competition_driver(competition_pk: int):
+    with get_redis_client().pipeline() as pipe:
+        pipe.sadd(checkpoint_key(competition_pk), CANCELLED)
+        pipe.expire(checkpoint_key(competition_pk), CHECKPOINT_TIMEOUT)
+        pipe.execute()
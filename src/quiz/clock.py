@@ -0,0 +1,159 @@
+"""
+Round timeline of a competition.
+
+Every round is ``answer_seconds`` of answering followed by ``rest_seconds``
+of rest, the competition ends after the rest of its last round. Everything
+is arithmetic over the elapsed seconds of the instant it's given, the clock
+never reads the time or the database itself.
+"""
+
+import math
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from django.utils import timezone
+
+from quiz.constants import ANSWER_TIME_SECOND, REST_BETWEEN_EACH_QUESTION_SECOND
+
+
+IDLE = "idle"
+ANSWER = "answer"
+REST = "rest"
+FINISHED = "finished"
+
+# the correct choice is revealed this long before the answer time is over
+REVEAL_BEFORE_DEADLINE_SECONDS = 2
+
+
+def get_duration(
+    question_count: int,
+    answer_seconds: float = ANSWER_TIME_SECOND,
+    rest_seconds: float = REST_BETWEEN_EACH_QUESTION_SECOND,
+) -> timedelta:
+    return timedelta(seconds=question_count * (answer_seconds + rest_seconds))
+
+
+@dataclass(frozen=True)
+class RoundClock:
+    start_at: datetime
+    question_count: int
+    answer_seconds: float = ANSWER_TIME_SECOND
+    rest_seconds: float = REST_BETWEEN_EACH_QUESTION_SECOND
+
+    @property
+    def round_seconds(self) -> float:
+        return self.answer_seconds + self.rest_seconds
+
+    @property
+    def end_at(self) -> datetime:
+        return self.start_at + get_duration(
+            self.question_count, self.answer_seconds, self.rest_seconds
+        )
+
+    def elapsed(self, now: datetime) -> float:
+        return (now - self.start_at).total_seconds()
+
+    def round_start(self, question_number: int) -> datetime:
+        return self.start_at + timedelta(
+            seconds=(question_number - 1) * self.round_seconds
+        )
+
+    def answer_deadline(self, question_number: int) -> datetime:
+        return self.round_start(question_number) + timedelta(
+            seconds=self.answer_seconds
+        )
+
+    def reveal_at(self, question_number: int) -> datetime:
+        return self.answer_deadline(question_number) - timedelta(
+            seconds=REVEAL_BEFORE_DEADLINE_SECONDS
+        )
+
+    def completed_rounds(self, now: datetime) -> int:
+        elapsed = self.elapsed(now)
+
+        if elapsed < 0:
+            return 0
+
+        return min(math.floor(elapsed / self.round_seconds), self.question_count)
+
+    def round_at(self, now: datetime) -> int:
+        """
+        Number of the question shown at ``now``, 0 before the start and the
+        last one once finished.
+        """
+        if self.elapsed(now) < 0:
+            return 0
+
+        return min(self.completed_rounds(now) + 1, self.question_count)
+
+    def phase_at(self, now: datetime) -> str:
+        elapsed = self.elapsed(now)
+
+        if elapsed < 0:
+            return IDLE
+
+        if elapsed >= self.question_count * self.round_seconds:
+            return FINISHED
+
+        if elapsed % self.round_seconds < self.answer_seconds:
+            return ANSWER
+
+        return REST
+
+    def next_deadline(self, now: datetime) -> datetime | None:
+        """
+        The next phase change after ``now``, None once finished.
+        """
+        phase = self.phase_at(now)
+
+        if phase == IDLE:
+            return self.start_at
+
+        if phase == FINISHED:
+            return None
+
+        question_number = self.completed_rounds(now) + 1
+
+        if phase == ANSWER:
+            return self.answer_deadline(question_number)
+
+        return self.round_start(question_number + 1)
+
+    def time_to_next_deadline(self, now: datetime) -> float | None:
+        deadline = self.next_deadline(now)
+
+        return None if deadline is None else (deadline - now).total_seconds()
+
+    def is_started(self, now: datetime) -> bool:
+        return self.start_at <= now
+
+    def is_in_progress(self, now: datetime) -> bool:
+        """
+        Started and the answer time of the last question isn't over.
+        """
+        return self.start_at <= now <= self.end_at - timedelta(
+            seconds=self.rest_seconds
+        )
+
+    def is_finished(self, now: datetime) -> bool:
+        return self.end_at <= now
+
+    def is_question_shown(self, question_number: int, now: datetime) -> bool:
+        return self.round_start(question_number) <= now
+
+    def is_answer_revealed(self, question_number: int, now: datetime) -> bool:
+        return self.reveal_at(question_number) <= now
+
+
+@lru_cache(maxsize=1024)
+def get_round_clock(start_at: datetime, question_count: int) -> RoundClock:
+    """
+    Clock of a competition, shared by every check made against the same
+    schedule.
+    """
+    if timezone.is_naive(start_at):
+        start_at = timezone.make_aware(start_at, timezone.get_current_timezone())
+
+    return RoundClock(start_at, question_count)
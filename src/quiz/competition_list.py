@@ -0,0 +1,160 @@
+"""
+Pre-rendered competition list snapshot of the quiz list sockets.
+
+The list of active competitions is serialized once per change into its final
+wire text and kept in cache with a version. The change itself is shipped to
+the ``quiz_list`` group already rendered, so connecting and listening sockets
+don't query or serialize anything. Clients drop updates with a version older
+than the snapshot they received.
+
+Enrollments only add to a redis counter per competition, the changed
+competitions are flushed at a fixed cadence into a single
+``enrollment_counts`` event carrying their absolute participants counts.
+"""
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.db.models import Count
+
+from core.renderers import render_camel_json
+from core.utils import get_redis_client
+from quiz.models import Competition, UserCompetition
+from quiz.serializers import CompetitionSerializer
+
+
+COMPETITION_LIST_TIMEOUT = 60 * 60 * 24
+
+COMPETITION_LIST_KEY = "quiz_list_snapshot"
+COMPETITION_LIST_VERSION_KEY = "quiz_list_snapshot_version"
+ENROLLMENT_DELTAS_KEY = "quiz_list_enrollment_deltas"
+
+
+def render_message(message: dict) -> str:
+    return render_camel_json(message)
+
+
+def next_competition_list_version():
+    cache.add(COMPETITION_LIST_VERSION_KEY, 0, None)
+
+    return cache.incr(COMPETITION_LIST_VERSION_KEY)
+
+
+def get_active_competitions(exclude_pk: int | None = None):
+    competitions = (
+        Competition.objects.filter(is_active=True)
+        .annotate(participants_count=Count("participants"))
+        .prefetch_related("questions", "sponsors")
+        .order_by("-created_at")
+    )
+
+    if exclude_pk is not None:
+        competitions = competitions.exclude(pk=exclude_pk)
+
+    return competitions
+
+
+def build_competition_list(exclude_pk: int | None = None):
+    """
+    Renders the active competitions and stores them as the latest snapshot,
+    ``exclude_pk`` leaves out a competition which is being deleted.
+
+    Returns the snapshot and the serialized competitions by pk.
+    """
+    competitions = CompetitionSerializer(
+        get_active_competitions(exclude_pk), many=True
+    ).data
+    version = next_competition_list_version()
+
+    snapshot = {
+        "version": version,
+        "text": render_message(
+            {"type": "competition_list", "data": competitions, "version": version}
+        ),
+    }
+
+    cache.set(COMPETITION_LIST_KEY, snapshot, COMPETITION_LIST_TIMEOUT)
+
+    return snapshot, {competition["id"]: competition for competition in competitions}
+
+
+def get_competition_list():
+    snapshot = cache.get(COMPETITION_LIST_KEY)
+
+    if snapshot is None:
+        snapshot, _ = build_competition_list()
+
+    return snapshot
+
+
+def invalidate_competition_list():
+    cache.delete(COMPETITION_LIST_KEY)
+
+
+def render_competition_change(competition: Competition, exclude: bool = False):
+    """
+    Rebuilds the snapshot and returns the rendered update of the competition
+    for the sockets already listening.
+    """
+    snapshot, competitions = build_competition_list(
+        competition.pk if exclude else None
+    )
+    data = competitions.get(competition.pk)
+
+    if data is None:
+        message = {"type": "remove_competition", "data": competition.pk}
+    else:
+        message = {"type": "update_competition", "data": data}
+
+    return render_message({**message, "version": snapshot["version"]})
+
+
+def record_enrollment_delta(competition_pk: int, delta: int):
+    get_redis_client().hincrby(ENROLLMENT_DELTAS_KEY, str(competition_pk), delta)
+
+
+def take_enrollment_deltas() -> dict[int, int]:
+    with get_redis_client().pipeline() as pipe:
+        pipe.hgetall(ENROLLMENT_DELTAS_KEY)
+        pipe.delete(ENROLLMENT_DELTAS_KEY)
+        deltas, _ = pipe.execute()
+
+    return {int(pk): int(delta) for pk, delta in deltas.items()}
+
+
+def flush_enrollment_counts():
+    """
+    Sends the participants counts of the competitions with enrollments since
+    the last flush to the quiz list sockets in one event.
+    """
+    changed = [pk for pk, delta in take_enrollment_deltas().items() if delta]
+
+    if not changed:
+        return []
+
+    counts = list(
+        UserCompetition.objects.filter(competition_id__in=changed)
+        .values("competition_id")
+        .annotate(participants_count=Count("pk"))
+        .values_list("competition_id", "participants_count")
+    )
+    counts += [(pk, 0) for pk in set(changed) - {pk for pk, _ in counts}]
+
+    snapshot, _ = build_competition_list()
+    data = [{"id": pk, "participants_count": count} for pk, count in counts]
+
+    async_to_sync(get_channel_layer().group_send)(  # type: ignore
+        "quiz_list",
+        {
+            "type": "enrollment_counts",
+            "text": render_message(
+                {
+                    "type": "enrollment_counts",
+                    "data": data,
+                    "version": snapshot["version"],
+                }
+            ),
+        },
+    )
+
+    return data
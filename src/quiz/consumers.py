@@ -1,63 +1,172 @@
 import json
+import time
 from typing import Any, Type
+from urllib.parse import parse_qs
 from channels.generic.websocket import (
     AsyncJsonWebsocketConsumer,
 )
-from channels.db import database_sync_to_async
+from django.conf import settings
 from django.utils import timezone
 from django.db.models import Q, Count
 from authentication.models import UserProfile
 from quiz.serializers import (
     CompetitionSerializer,
     QuestionSerializer,
-    UserAnswerSerializer,
     UserCompetitionSerializer,
+    serialize_user_competition,
 )
+from core.executor import run_in_sync_executor
+from core.metrics import BufferedCounters
+from core.renderers import (
+    MSGPACK_SUBPROTOCOL,
+    describe_rendered,
+    json_to_msgpack,
+    render_camel_json,
+    render_camel_msgpack,
+    stamp_msgpack,
+)
+from core.utils import acache_get
 from quiz.utils import (
-    get_previous_round_losses,
-    get_quiz_question_state,
-    get_round_participants,
+    ais_user_eligible_to_participate,
+    get_quiz_stats,
     is_user_eligible_to_participate,
 )
-from djangorestframework_camel_case.render import CamelCaseJSONRenderer
-from .models import Competition, Question, Choice, UserCompetition, UserAnswer
+from quiz.payloads import (
+    forget_question_payloads,
+    get_cached_question_payload,
+    load_question_payload,
+)
+from quiz.answer_key import get_answers_history, get_open_question
+from quiz.competition_list import COMPETITION_LIST_KEY, get_competition_list
+from quiz.broadcast import get_broadcast_hub, is_broadcast_hub_enabled
+from quiz.events import get_last_seq, get_missed_events
+from quiz.ingestion import (
+    build_answer_result,
+    claim_answer,
+    enqueue_answer,
+    ingest_answer,
+    is_write_behind_enabled,
+    release_answer_claim,
+    validate_answer,
+)
+from .models import Competition, Question, UserCompetition, UserAnswer
 
 import json
 import logging
+import msgpack
 
 
 logger = logging.getLogger(__name__)
 
+# bytes and messages in and out of the websockets per message type, before
+# compression
+websocket_traffic = BufferedCounters(
+    "websocket_traffic", settings.WEBSOCKET_METRICS_FLUSH_SECONDS
+)
+
+# commands of the quiz sockets, the traffic of any other is counted as unknown
+# so clients can't add counters
+QUIZ_COMMANDS = frozenset(
+    {
+        "PING",
+        "RESUME",
+        "TIME_SYNC",
+        "GET_CURRENT_QUESTION",
+        "GET_COMPETITION",
+        "GET_STATS",
+        "GET_QUESTION",
+        "GET_HINT",
+        "ANSWER",
+    }
+)
+
 
 class BaseJsonConsumer(AsyncJsonWebsocketConsumer):
+    # MessagePack binary frames instead of JSON text, negotiated at connect
+    binary = False
+
+    async def accept(self, subprotocol=None, headers=None):
+        if MSGPACK_SUBPROTOCOL in self.scope.get("subprotocols", ()):
+            self.binary = True
+            subprotocol = MSGPACK_SUBPROTOCOL
+
+        await super().accept(subprotocol, headers)
+
+    async def count_traffic(self, direction: str, message_type, size: int):
+        websocket_traffic.incr(f"{direction}_{message_type}_bytes", size)
+        websocket_traffic.incr(f"{direction}_{message_type}_messages")
+
+        await websocket_traffic.aflush()
 
     async def send_json(self, content, close=False):
         """
         Encode the given content as JSON and send it to the client.
         """
-        await super().send(text_data=await self.encode_json(content), close=close)
+        message_type = content.get("type") if isinstance(content, dict) else None
+
+        if self.binary:
+            bytes_data = render_camel_msgpack(content)
+
+            await super().send(bytes_data=bytes_data, close=close)
+            await self.count_traffic("out", message_type, len(bytes_data))
+            return
+
+        text_data = await self.encode_json(content)
+
+        await super().send(text_data=text_data, close=close)
+        await self.count_traffic("out", message_type, len(text_data.encode("utf-8")))
+
+    async def send_rendered(self, text_data: str):
+        """
+        Sends a message already rendered to its JSON text.
+        """
+        message_type, size = describe_rendered(text_data)
+
+        if self.binary:
+            bytes_data = json_to_msgpack(text_data)
+            size = len(bytes_data)
+
+            await self.send(bytes_data=bytes_data)
+        else:
+            await self.send(text_data=text_data)
+
+        await self.count_traffic("out", message_type, size)
+
+    async def send_pong(self):
+        """
+        Replies to PING in the format the socket negotiated.
+        """
+        if self.binary:
+            bytes_data = render_camel_msgpack("PONG")
+            size = len(bytes_data)
+
+            await self.send(bytes_data=bytes_data)
+        else:
+            size = len("PONG")
+
+            await self.send(text_data="PONG")
+
+        await self.count_traffic("out", "PONG", size)
 
     @classmethod
     async def encode_json(cls, content):
-        return CamelCaseJSONRenderer().render(content).decode("utf-8")
+        return render_camel_json(content)
 
-    @database_sync_to_async
-    def resolve_user(self):
-        if hasattr(self.scope["user"], "profile"):
-            return self.scope["user"].profile
-
-        return None
+    async def resolve_user(self):
+        # the middleware resolves the user along with its profile
+        return getattr(self.scope["user"], "profile", None)
 
 
 class QuizListConsumer(BaseJsonConsumer):
-    @database_sync_to_async
-    def get_quiz_list(self):
-        return CompetitionSerializer(
-            Competition.objects.filter(is_active=True).order_by("-created_at"),
-            many=True,
-        ).data
+    async def get_quiz_list(self):
+        snapshot = await acache_get(COMPETITION_LIST_KEY)
+
+        if snapshot is None:
+            snapshot = await run_in_sync_executor(get_competition_list)()
+
+        return snapshot["text"]
 
-    @database_sync_to_async
+    @run_in_sync_executor
     def get_enrollments_list(self):
         if not self.user_profile:
             return []
@@ -80,88 +189,73 @@ class QuizListConsumer(BaseJsonConsumer):
             self.competition_group_name, self.channel_name
         )
 
-        await self.send_json(
-            {"type": "competition_list", "data": await self.get_quiz_list()}
-        )
+        await self.send_rendered(await self.get_quiz_list())
         await self.send_json(
             {"type": "user_enrolls", "data": await self.get_enrollments_list()}
         )
 
-    @database_sync_to_async
-    def resolve_competition(self, pk):
-        competition = Competition.objects.get(pk=pk)
+    async def update_competition_data(self, event):
+        await self.send_rendered(event["text"])
 
-        return CompetitionSerializer(instance=competition).data
+    async def enrollment_counts(self, event):
+        await self.send_rendered(event["text"])
 
-    async def update_competition_data(self, event):
-        pk = event["data"]
+    async def delete_competition(self, event):
+        await self.send_rendered(event["text"])
 
-        data = await self.resolve_competition(pk)
 
-        if data["is_active"] is False:
-            await self.delete_competition(event)
-            return
+class QuizConsumer(BaseJsonConsumer):
+    user_competition: UserCompetition
+    user_profile: UserProfile
 
-        await self.send_json({"type": "update_competition", "data": data})
+    # greatest fencing token of the round driver events received so far
+    fence = 0
 
-    async def increase_enrollment(self, event):
-        await self.send_json({"type": "increase_enrollment", "data": event["data"]})
+    competition_data: dict | None = None
 
-    async def delete_competition(self, event):
-        pk = event["data"]
+    async def dispatch(self, message):
+        fence = message.get("fence")
 
-        await self.send_json({"type": "remove_competition", "data": pk})
+        if fence is not None:
+            if fence < self.fence:
+                logger.info(f"dropped {message['type']} from a stale round driver")
+                return
 
+            self.fence = fence
 
-class QuizConsumer(BaseJsonConsumer):
-    user_competition: UserCompetition
-    user_profile: UserProfile
+        await super().dispatch(message)
 
-    @database_sync_to_async
+    @run_in_sync_executor
     def send_user_answers(self):
         if not self.user_profile:
             return {}
 
-        answers = UserAnswer.objects.filter(
-            user_competition__competition=self.competition,
-            user_competition__user_profile=self.user_profile,
+        return get_answers_history(
+            self.competition, self.user_competition, self.get_user_competition_data()
         )
 
-        diff = get_quiz_question_state(self.competition) - 1 - answers.count()
-        missed_answers = []
+    def get_user_competition_data(self):
+        """
+        The participant as the answers render it, the competition in it is
+        serialized once per socket.
+        """
+        if self.user_competition is None:
+            return None
 
-        if diff > 0:
-            for i in range(diff):
-                question = Question.objects.get(
-                    number=answers.count() + i + 1, competition=self.competition
-                )
-                answer = UserAnswer(
-                    user_competition=self.user_competition, question=question, id=-1
-                )
-                missed_answers.append(answer)
+        if self.competition_data is None:
+            self.competition_data = CompetitionSerializer(self.competition).data
 
-        serialized_answers = UserAnswerSerializer(
-            list(answers) + missed_answers, many=True
-        )
+        return serialize_user_competition(self.user_competition, self.competition_data)
 
-        return list(
-            map(
-                lambda x: (
-                    x
-                    if x["selected_choice"]
-                    else {**x, "selected_choice": {"is_correct": False, "id": None}}
-                ),
-                serialized_answers.data,
-            )
-        )
+    async def resolve_user_competition(self):
+        if not self.user_profile:
+            return None
 
-    @database_sync_to_async
-    def resolve_user_competition(self):
-        return UserCompetition.objects.filter(
+        return await UserCompetition.objects.filter(
             user_profile=self.user_profile, competition=self.competition
-        ).first()
+        ).afirst()
 
-    @database_sync_to_async
+    @run_in_sync_executor
     def send_hint_question(self, question_id):
 
         user_competition = self.user_competition
@@ -169,61 +263,115 @@ class QuizConsumer(BaseJsonConsumer):
         if not user_competition or user_competition.hint_count <= 0:
             return
 
-        question: Question = Question.objects.get(
-            pk=question_id, competition=self.competition
-        )
+        question = get_open_question(self.competition, question_id)
 
-        user_competition.hint_count -= 1
-        user_competition.save()
+        if not UserCompetition.objects.use_hint(user_competition.pk):
+            user_competition.hint_count = 0
+            return
 
-        return list(
-            question.choices.filter(is_hinted_choice=True).values_list("pk", flat=True)
-        )
+        user_competition.hint_count = max(user_competition.hint_count - 1, 0)
+
+        return question["hinted_choices"]
+
+    async def get_competition(self):
+        return await Competition.objects.filter(pk=self.competition_id).afirst()
+
+    async def get_question_payload(self, question_number: int) -> str | None:
+        payload = get_cached_question_payload(self.competition_id, question_number)
+
+        if payload is None:
+            payload = await run_in_sync_executor(load_question_payload)(
+                self.competition_id, question_number
+            )
+
+        if payload is None:
+            logger.warning(
+                f"competition {self.competition_id} has no question {question_number}"
+            )
+            return None
 
-    @database_sync_to_async
-    def get_competition(self):
-        return Competition.objects.filter(pk=self.competition_id).first()
+        return payload[await self.is_user_eligible_to_participate()]
 
     async def send_question(self, event):
-        question_data = event["data"]
+        payload = await self.get_question_payload(event["data"])
 
-        await self.send_json(
-            {
-                "question": {
-                    **json.loads(question_data),
-                    "is_eligible": await database_sync_to_async(
-                        lambda: is_user_eligible_to_participate(
-                            self.user_profile, self.competition
-                        )
-                    )(),
-                },
-                "type": "new_question",
-            }
-        )
+        if payload is not None:
+            await self.send_event(event, payload)
 
     async def send_quiz_stats(self, event):
-        state = event["data"]
-        await self.send_json(await self.get_quiz_stats(state))
+        await self.send_event(event, self.with_hint_count(event["data"]))
+
+    async def send_event(self, event, message: str | dict):
+        """
+        Stamps the sequence number of the group event on its message, the
+        client resumes from the last one it saw after reconnecting. The
+        message is either rendered JSON text or the content to encode.
+        """
+        seq = event.get("seq") if event else None
+
+        if seq is None:
+            pass
+        elif isinstance(message, dict):
+            message = {"seq": seq, **message}
+        elif self.binary:
+            bytes_data = stamp_msgpack(json_to_msgpack(message), "seq", seq)
+
+            await self.send(bytes_data=bytes_data)
+            await self.count_traffic(
+                "out", describe_rendered(message)[0], len(bytes_data)
+            )
+            return
+        else:
+            # the stamped text differs per event, it's described before
+            message_type, size = describe_rendered(message)
+            stamp = f'{{"seq":{seq},'
+
+            await self.send(text_data=stamp + message[1:])
+            await self.count_traffic("out", message_type, size + len(stamp) - 1)
+            return
+
+        if isinstance(message, dict):
+            await self.send_json(message)
+        else:
+            await self.send_rendered(message)
 
-    @database_sync_to_async
-    def calculate_quiz_winners(self):
-        return list(
-            UserCompetition.objects.filter(is_winner=True, competition=self.competition)
+    async def calculate_quiz_winners(self):
+        return [
+            winner
+            async for winner in UserCompetition.objects.filter(
+                is_winner=True, competition=self.competition
+            )
             .values("user_profile__wallet_address", "tx_hash")
             .distinct()
-        )
+        ]
 
     async def finish_quiz(self, event):
+        forget_question_payloads(self.competition_id)
 
-        winners = await self.calculate_quiz_winners()
+        if event and "winners_list" in event["data"]:
+            winners = event["data"]["winners_list"]
+        else:
+            winners = await self.calculate_quiz_winners()
 
-        await self.send_json({"winners_list": winners, "type": "quiz_finish"})
+        await self.send_event(event, {"winners_list": winners, "type": "quiz_finish"})
 
-    @database_sync_to_async
-    def get_question(self, index: int):
-        instance = Question.objects.can_be_shown.filter(
-            competition__pk=self.competition_id, number=index
-        ).first()
+    @run_in_sync_executor
+    def get_revealed_question(self, question_number: int):
+        """
+        Renders the question fresh once its correct choice is revealed, the
+        pre-rendered payloads hide the correct choice and carry the counts of
+        the warm-up.
+        """
+        instance = (
+            Question.objects.can_be_shown.filter(
+                competition__pk=self.competition_id, number=question_number
+            )
+            .select_related("competition")
+            .first()
+        )
+
+        if instance is None:
+            return None
 
         data: Any = QuestionSerializer(instance=instance).data
 
@@ -237,7 +385,7 @@ class QuizConsumer(BaseJsonConsumer):
             "type": "new_question",
         }
 
-    @database_sync_to_async
+    @run_in_sync_executor
     def get_question_with_pk(self, index: int):
         instance = Question.objects.can_be_shown.filter(
             competition__pk=self.competition_id, pk=index
@@ -255,71 +403,60 @@ class QuizConsumer(BaseJsonConsumer):
             "type": "new_question",
         }
 
-    @database_sync_to_async
-    def is_user_eligible_to_participate(self):
-        return is_user_eligible_to_participate(
+    async def is_user_eligible_to_participate(self):
+        return await ais_user_eligible_to_participate(
             user_profile=self.user_profile, competition=self.competition
         )
 
-    @database_sync_to_async
-    def get_quiz_stats(self, state=None):
-        prize_to_win = self.competition.prize_amount
-        users_participated = UserCompetition.objects.filter(
-            competition=self.competition
-        )
-
-        question_number = state or get_quiz_question_state(self.competition)
-
-        participating_count = get_round_participants(
-            self.competition, users_participated, question_number
-        )
-
+    def with_hint_count(self, stats: dict):
         return {
             "type": "quiz_stats",
             "data": {
-                "users_participating": participating_count,
-                "prize_to_win": (
-                    prize_to_win
-                    if self.competition.split_prize is False
-                    else (
-                        prize_to_win / participating_count
-                        if participating_count > 0
-                        else 0
-                    )
-                ),
-                "total_participants_count": self.competition.participants.count(),
-                "questions_count": self.competition.questions.count(),
+                **stats,
                 "hint_count": (
                     self.user_competition.hint_count if self.user_competition else 0
                 ),
-                "previous_round_losses": get_previous_round_losses(
-                    self.competition, users_participated, question_number
-                ),
             },
         }
 
-    async def get_current_question(self):
-        competition_time = self.competition.start_at
+    @run_in_sync_executor
+    def get_quiz_stats(self, state=None):
+        return self.with_hint_count(get_quiz_stats(self.competition, state))
 
+    async def send_current_question(self):
         now = timezone.now()
 
-        if now < competition_time:
-            return {"error": "wait for competition to begin", "data": None}
+        if not self.competition.clock.is_started(now):
+            await self.send_json(
+                {"error": "wait for competition to begin", "data": None}
+            )
+            return
 
-        state = await database_sync_to_async(get_quiz_question_state)(
-            competition=self.competition
-        )
+        question_number = self.competition.clock.round_at(now)
 
-        question = await self.get_question(state)
+        if self.competition.clock.is_answer_revealed(question_number, now):
+            question = await self.get_revealed_question(question_number)
+
+            if question is None:
+                await self.send_json({"error": "question not found", "data": None})
+            else:
+                await self.send_json(question)
+            return
+
+        payload = await self.get_question_payload(question_number)
+
+        if payload is None:
+            await self.send_json({"error": "question not found", "data": None})
+            return
 
-        return question
+        await self.send_rendered(payload)
 
-    @database_sync_to_async
+    @run_in_sync_executor
     def get_competition_stats(self) -> Any:
         return CompetitionSerializer(instance=self.competition).data
 
     async def connect(self):
-        self.competition_id = self.scope["url_route"]["kwargs"]["competition_id"]
+        self.competition_id = int(self.scope["url_route"]["kwargs"]["competition_id"])
 
         self.competition_group_name = f"quiz_{self.competition_id}"
         self.competition: Competition = await self.get_competition()
@@ -331,20 +468,70 @@ class QuizConsumer(BaseJsonConsumer):
         if not self.channel_layer:
             return
 
-        await self.channel_layer.group_add(
-            self.competition_group_name, self.channel_name
+        if is_broadcast_hub_enabled():
+            await get_broadcast_hub().join(self.competition_group_name, self)
+        else:
+            await self.channel_layer.group_add(
+                self.competition_group_name, self.channel_name
+            )
+
+        seq = parse_qs(self.scope["query_string"].decode()).get("seq")
+
+        await self.resume(seq[0] if seq else None)
+
+    async def resume(self, seq):
+        """
+        Replays the events after ``seq``, the full state is sent instead when
+        they aren't retained or ``seq`` isn't a number.
+        """
+        try:
+            events = await get_missed_events(self.competition_id, int(seq))
+        except (TypeError, ValueError):
+            events = None
+
+        if events is None:
+            await self.send_current_state()
+            return
+
+        for event in events:
+            await self.dispatch(event)
+
+    async def get_time_sync(self, client_time=None):
+        """
+        Everything the client needs to follow the rounds on its own clock,
+        ``client_time`` is echoed back so it can estimate its offset from the
+        round trip.
+        """
+        return {
+            "type": "time_sync",
+            "data": {
+                "server_time": int(time.time() * 1000),
+                "client_time": client_time,
+                "start_at": self.competition.start_at,
+                "answer_time_seconds": self.competition.clock.answer_seconds,
+                "rest_time_seconds": self.competition.clock.rest_seconds,
+                "question_count": self.competition.question_count,
+            },
+        }
+
+    async def send_current_state(self):
+        await self.send_json(
+            {"type": "event_seq", "data": await get_last_seq(self.competition_id)}
         )
+        await self.send_json(await self.get_time_sync())
         await self.send_json(
             {"type": "answers_history", "data": await self.send_user_answers()}
         )
 
         await self.send_json(await self.get_quiz_stats())
 
-        if self.competition.start_at > timezone.now():
+        now = timezone.now()
+
+        if not self.competition.clock.is_started(now):
             await self.send_json({"type": "idle", "message": "wait for quiz to start"})
 
-        elif await database_sync_to_async(lambda: self.competition.is_in_progress)():
-            await self.send_json(await self.get_current_question())
+        elif self.competition.clock.is_in_progress(now):
+            await self.send_current_question()
         else:
             await self.finish_quiz(None)
 
@@ -353,23 +540,45 @@ class QuizConsumer(BaseJsonConsumer):
         if not self.channel_layer:
             return
 
+        if is_broadcast_hub_enabled():
+            await get_broadcast_hub().leave(self.competition_group_name, self)
+            return
+
         await self.channel_layer.group_discard(
             self.competition_group_name, self.channel_name
         )
 
-    async def receive(self, text_data):
-        data = json.loads(text_data)
+    async def receive(self, text_data=None, bytes_data=None):
+        if bytes_data is not None:
+            data = msgpack.unpackb(bytes_data)
+            size = len(bytes_data)
+        else:
+            data = json.loads(text_data)
+            size = len(text_data.encode("utf-8"))
+
         command = data["command"]
 
+        is_known = isinstance(command, str) and command in QUIZ_COMMANDS
+
+        await self.count_traffic("in", command if is_known else "unknown", size)
+
         if command == "PING":
-            await self.send("PONG")
+            await self.send_pong()
+
+        if command == "RESUME":
+            await self.resume(data.get("args", {}).get("seq"))
+
+        if command == "TIME_SYNC":
+            await self.send_json(
+                await self.get_time_sync(data.get("args", {}).get("clientTime"))
+            )
 
         if not self.user_profile:
             return
 
         try:
             if command == "GET_CURRENT_QUESTION":
-                await self.send_json(await self.get_current_question())
+                await self.send_current_question()
 
             if command == "GET_COMPETITION":
                 await self.send_json(await self.get_competition_stats())
@@ -384,7 +593,7 @@ class QuizConsumer(BaseJsonConsumer):
 
             if command == "GET_HINT":
                 hint_choices = await self.send_hint_question(
-                    data["args"]["question_id"]
+                    int(data["args"]["question_id"])
                 )
 
                 await self.send_json(
@@ -401,11 +610,14 @@ class QuizConsumer(BaseJsonConsumer):
                 if is_eligible is False:
                     return
 
-                res = await self.save_answer(  # TODO: parse parameters with django camel case
-                    data["args"]["questionId"],
-                    data["args"]["selectedChoiceId"],
+                res = await self.answer(
+                    int(data["args"]["questionId"]),
+                    int(data["args"]["selectedChoiceId"]),
                 )
 
+                if res is None:
+                    return
+
                 await self.send_json(
                     {
                         "type": "add_answer",
@@ -425,30 +637,55 @@ class QuizConsumer(BaseJsonConsumer):
 
         await self.send(text_data=json.dumps({"message": message}))
 
-    @database_sync_to_async
+    async def answer(self, question_id: int, selected_choice_id: int):
+        if not await claim_answer(self.user_competition, question_id):
+            logger.info(f"dropped a duplicate answer to question {question_id}")
+            return None
+
+        try:
+            if is_write_behind_enabled():
+                return await self.ingest_answer(question_id, selected_choice_id)
+
+            return await self.save_answer(question_id, selected_choice_id)
+        except Exception:
+            # rejected or failed answers are never recorded, the claim is
+            # released so a valid answer or a retry isn't dropped
+            await release_answer_claim(self.user_competition, question_id)
+            raise
+
+    async def ingest_answer(self, question_id, selected_choice_id):
+        res = await self.validate_ingested_answer(question_id, selected_choice_id)
+
+        await enqueue_answer(self.user_competition, question_id, selected_choice_id)
+
+        return res
+
+    @run_in_sync_executor
+    def validate_ingested_answer(self, question_id, selected_choice_id):
+        return ingest_answer(
+            self.competition,
+            self.user_competition,
+            question_id,
+            selected_choice_id,
+            self.get_user_competition_data(),
+        )
+
+    @run_in_sync_executor
     def save_answer(self, question_id, selected_choice_id):
-        question: Question = Question.objects.can_be_shown.get(pk=question_id)
-        selected_choice = Choice.objects.filter(pk=selected_choice_id).first()
-        user_competition = self.user_competition
+        question, _ = validate_answer(
+            self.competition, question_id, selected_choice_id
+        )
 
         answer = UserAnswer.objects.create(
-            user_competition=user_competition,
-            question=question,
+            user_competition=self.user_competition,
+            question_id=question_id,
             selected_choice_id=selected_choice_id,
         )
 
-        if selected_choice and selected_choice.is_correct is True:
-            correct_choice = selected_choice_id
-        else:
-            correct_choice = (
-                Choice.objects.filter(question=question, is_correct=True).get().pk
-            )
-
-        return {
-            "is_correct": selected_choice.is_correct if selected_choice else False,
-            "answer": UserAnswerSerializer(
-                instance=answer, context={"create": True}
-            ).data,
-            "question_number": question.number,
-            "correct_choice": correct_choice,
-        }
+        return build_answer_result(
+            self.get_user_competition_data(),
+            question,
+            question_id,
+            selected_choice_id,
+            answer.pk,
+        )
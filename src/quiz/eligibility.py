@@ -0,0 +1,113 @@
+"""
+Per competition eligibility index.
+
+The progress of every enrolled user is kept in the cache so the eligibility
+checks done on the broadcast path (one per connected socket) never hit the
+database. The index is filled in one query before the competition
+starts and re-synced whenever a round closes, answers update it as they are
+stored. The database side of the progress lives in the counters of
+``UserCompetition``.
+"""
+
+from django.core.cache import cache
+
+from quiz.models import Competition, UserCompetition
+
+
+NOT_ENROLLED = -2
+ELIMINATED = -1
+
+INDEX_TIMEOUT = 60 * 60 * 24
+
+
+def progress_key(competition_pk: int, user_profile_pk: int):
+    return f"quiz_{competition_pk}_progress_{user_profile_pk}"
+
+
+def calculate_progress(
+    correct_answer_count: int, eliminated_at_question: int | None
+) -> int:
+    if eliminated_at_question is not None:
+        return ELIMINATED
+
+    return correct_answer_count
+
+
+def load_user_progress(user_profile_pk: int, competition_pk: int) -> int:
+    user_competition = (
+        UserCompetition.objects.filter(
+            user_profile_id=user_profile_pk, competition_id=competition_pk
+        )
+        .values_list("correct_answer_count", "eliminated_at_question")
+        .first()
+    )
+
+    if user_competition is None:
+        return NOT_ENROLLED
+
+    return calculate_progress(*user_competition)
+
+
+def get_user_progress(user_profile_pk: int, competition_pk: int) -> int:
+    """
+    Returns the number of questions the user answered correctly, ELIMINATED
+    once a wrong answer is stored or NOT_ENROLLED.
+    """
+    key = progress_key(competition_pk, user_profile_pk)
+    progress = cache.get(key)
+
+    if progress is None:
+        progress = load_user_progress(user_profile_pk, competition_pk)
+        cache.set(key, progress, INDEX_TIMEOUT)
+
+    return progress
+
+
+def record_answer(
+    competition_pk: int, user_profile_pk: int, question_number: int, is_correct: bool
+):
+    key = progress_key(competition_pk, user_profile_pk)
+
+    if is_correct is False:
+        cache.set(key, ELIMINATED, INDEX_TIMEOUT)
+        return
+
+    progress = cache.get(key)
+
+    if progress == ELIMINATED:
+        return
+
+    if progress is None or progress == NOT_ENROLLED:
+        # let the next lookup load it from the database
+        cache.delete(key)
+        return
+
+    cache.set(key, max(progress, question_number), INDEX_TIMEOUT)
+
+
+def record_enrollment(competition_pk: int, user_profile_pk: int):
+    cache.set(progress_key(competition_pk, user_profile_pk), 0, INDEX_TIMEOUT)
+
+
+def forget_enrollment(competition_pk: int, user_profile_pk: int):
+    cache.delete(progress_key(competition_pk, user_profile_pk))
+
+
+def build_eligibility_index(competition: Competition):
+    """
+    Loads the progress of all the participants with a single query, used to
+    warm the index before start and to re-sync it when a round closes.
+    """
+    participants = UserCompetition.objects.filter(
+        competition=competition
+    ).values_list("user_profile_id", "correct_answer_count", "eliminated_at_question")
+
+    cache.set_many(
+        {
+            progress_key(competition.pk, user_profile_pk): calculate_progress(
+                correct_answer_count, eliminated_at_question
+            )
+            for user_profile_pk, correct_answer_count, eliminated_at_question in participants
+        },
+        INDEX_TIMEOUT,
+    )
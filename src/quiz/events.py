@@ -0,0 +1,73 @@
+"""
+Sequenced event stream of the competitions.
+
+Every group event of a competition gets the next sequence number and the last
+``QUIZ_EVENT_STREAM_LENGTH`` events are kept in a redis stream, with the
+sequence number as the entry id. A socket reconnecting with the last sequence
+it saw gets only the events it missed, unless they are no longer retained.
+"""
+
+import json
+
+from django.conf import settings
+
+from core.utils import get_async_redis_client
+
+
+EVENT_STREAM_TIMEOUT = 60 * 60 * 24
+
+
+def event_stream_key(competition_pk: int):
+    return f"quiz_{competition_pk}_events"
+
+
+def event_seq_key(competition_pk: int):
+    return f"quiz_{competition_pk}_event_seq"
+
+
+async def append_event(competition_pk: int, event: dict) -> dict:
+    client = get_async_redis_client()
+
+    seq = await client.incr(event_seq_key(competition_pk))
+    event = {**event, "seq": seq}
+
+    async with client.pipeline(transaction=False) as pipe:
+        pipe.xadd(
+            event_stream_key(competition_pk),
+            {"event": json.dumps(event)},
+            id=f"{seq}-0",
+            maxlen=settings.QUIZ_EVENT_STREAM_LENGTH,
+            approximate=False,
+        )
+        pipe.expire(event_stream_key(competition_pk), EVENT_STREAM_TIMEOUT)
+        pipe.expire(event_seq_key(competition_pk), EVENT_STREAM_TIMEOUT)
+        await pipe.execute()
+
+    return event
+
+
+async def get_last_seq(competition_pk: int) -> int:
+    return int(await get_async_redis_client().get(event_seq_key(competition_pk)) or 0)
+
+
+async def get_missed_events(competition_pk: int, seq: int) -> list[dict] | None:
+    """
+    The events after ``seq``, None when some of them are not retained anymore
+    and the socket needs the full state instead.
+    """
+    last_seq = await get_last_seq(competition_pk)
+
+    if seq == last_seq:
+        return []
+
+    if seq > last_seq:
+        return None
+
+    entries = await get_async_redis_client().xrange(
+        event_stream_key(competition_pk), min=f"{seq + 1}-0", max="+"
+    )
+
+    if not entries or entries[0][0] != f"{seq + 1}-0".encode():
+        return None
+
+    return [json.loads(fields[b"event"]) for _, fields in entries]
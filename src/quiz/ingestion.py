@@ -0,0 +1,208 @@
+"""
+Write-behind answer ingestion.
+
+Answers are validated against the cached answer key, acknowledged right away
+and pushed into a redis list per competition. The round driver flushes the
+queue into ``UserAnswer`` with batched inserts before the round stats and the
+winners are calculated.
+"""
+
+import json
+import logging
+
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
+
+from core.utils import get_async_redis_client, get_redis_client
+from quiz.answer_key import AnswerRejected, get_answer_key, get_open_question
+from quiz.eligibility import INDEX_TIMEOUT, record_answer
+from quiz.models import Competition, UserAnswer, UserCompetition
+from quiz.serializers import serialize_user_competition
+
+
+logger = logging.getLogger(__name__)
+
+
+def answers_queue_key(competition_pk: int):
+    return f"quiz_{competition_pk}_answers_queue"
+
+
+def answer_claim_key(competition_pk: int, user_competition_pk: int, question_id: int):
+    return f"quiz_{competition_pk}_answer_claim_{user_competition_pk}_{question_id}"
+
+
+async def claim_answer(user_competition: UserCompetition, question_id: int) -> bool:
+    """
+    Only the first answer of a participant to a question gets the claim,
+    retries and double taps are dropped before reaching the database.
+    """
+    return bool(
+        await get_async_redis_client().set(
+            answer_claim_key(
+                user_competition.competition_id,  # type: ignore
+                user_competition.pk,
+                question_id,
+            ),
+            1,
+            nx=True,
+            ex=INDEX_TIMEOUT,
+        )
+    )
+
+
+async def release_answer_claim(user_competition: UserCompetition, question_id: int):
+    await get_async_redis_client().delete(
+        answer_claim_key(
+            user_competition.competition_id,  # type: ignore
+            user_competition.pk,
+            question_id,
+        )
+    )
+
+
+def is_write_behind_enabled():
+    return settings.ANSWER_INGESTION_MODE == "write_behind"
+
+
+def validate_answer(competition: Competition, question_id: int, selected_choice_id: int):
+    """
+    Returns the answer key entry of the question and whether the selected
+    choice is correct.
+    """
+    question = get_open_question(competition, question_id)
+
+    if selected_choice_id not in question["choices"]:
+        raise AnswerRejected("choice does not belong to the question")
+
+    return question, question["correct_choice"] == selected_choice_id
+
+
+def build_answer_result(
+    user_competition_data: dict,
+    question: dict,
+    question_id: int,
+    selected_choice_id: int,
+    answer_pk: int | None = None,
+):
+    is_correct = question["correct_choice"] == selected_choice_id
+
+    return {
+        "is_correct": is_correct,
+        "answer": {
+            "id": answer_pk,
+            "user_competition": user_competition_data,
+            "question": question_id,
+            "selected_choice": {
+                "id": selected_choice_id,
+                "text": question["choices"][selected_choice_id],
+                "is_correct": is_correct,
+                "question": question_id,
+            },
+        },
+        "question_number": question["number"],
+        "correct_choice": question["correct_choice"],
+    }
+
+
+async def enqueue_answer(
+    user_competition: UserCompetition, question_id: int, selected_choice_id: int
+):
+    await get_async_redis_client().rpush(  # type: ignore
+        answers_queue_key(user_competition.competition_id),  # type: ignore
+        json.dumps(
+            {
+                "user_competition": user_competition.pk,
+                "question": question_id,
+                "selected_choice": selected_choice_id,
+            }
+        ),
+    )
+
+
+def ingest_answer(
+    competition: Competition,
+    user_competition: UserCompetition,
+    question_id: int,
+    selected_choice_id: int,
+    user_competition_data: dict | None = None,
+):
+    """
+    Validates the answer and updates the eligibility index, the answer itself
+    is stored by ``enqueue_answer``.
+    """
+    question, is_correct = validate_answer(competition, question_id, selected_choice_id)
+
+    record_answer(
+        user_competition.competition_id,  # type: ignore
+        user_competition.user_profile_id,  # type: ignore
+        question["number"],
+        is_correct,
+    )
+
+    if user_competition_data is None:
+        user_competition_data = serialize_user_competition(user_competition)
+
+    return build_answer_result(
+        user_competition_data, question, question_id, selected_choice_id
+    )
+
+
+def record_answers_progress(competition_pk: int, answers: list[UserAnswer]):
+    """
+    Bulk inserts skip the signals, so the progress counters of the flushed
+    answers are updated with one query per question and correctness.
+    """
+    answer_key = get_answer_key(competition_pk)
+    groups = defaultdict(list)
+
+    for answer in answers:
+        question = answer_key[answer.question_id]  # type: ignore
+        is_correct = question["correct_choice"] == answer.selected_choice_id  # type: ignore
+        groups[(question["number"], is_correct)].append(answer.user_competition_id)  # type: ignore
+
+    for (question_number, is_correct), user_competition_pks in groups.items():
+        UserCompetition.objects.record_answers(
+            user_competition_pks, question_number, is_correct
+        )
+
+
+def flush_answers(competition_pk: int, batch_size: int | None = None) -> int:
+    """
+    Drains the answers queue of the competition into the database.
+    """
+    batch_size = batch_size or settings.ANSWER_INGESTION_BATCH_SIZE
+    client = get_redis_client()
+    key = answers_queue_key(competition_pk)
+    flushed = 0
+
+    while True:
+        with client.pipeline() as pipe:
+            pipe.lrange(key, 0, batch_size - 1)
+            pipe.ltrim(key, batch_size, -1)
+            items, _ = pipe.execute()
+
+        if not items:
+            break
+
+        answers = [
+            UserAnswer(
+                user_competition_id=data["user_competition"],
+                question_id=data["question"],
+                selected_choice_id=data["selected_choice"],
+            )
+            for data in map(json.loads, items)
+        ]
+
+        try:
+            with transaction.atomic():
+                UserAnswer.objects.bulk_create(answers, ignore_conflicts=True)
+                record_answers_progress(competition_pk, answers)
+        except Exception:
+            logger.exception(f"failed to flush answers of competition {competition_pk}")
+            client.lpush(key, *reversed(items))
+            raise
+
+        flushed += len(answers)
+
+    return flushed
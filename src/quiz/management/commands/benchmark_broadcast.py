@@ -0,0 +1,149 @@
+import asyncio
+import json
+import statistics
+
+from channels.db import database_sync_to_async
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from authentication.models import UserProfile
+from quiz.consumers import QuizConsumer
+from quiz.eligibility import INDEX_TIMEOUT, progress_key
+from quiz.models import Competition
+from quiz.payloads import (
+    forget_question_payloads,
+    get_question_payloads_version,
+    question_payload_key,
+    question_payloads_key,
+)
+from quiz.utils import is_user_eligible_to_participate
+
+
+# pk of the synthetic competition, no rows are written to the database
+BENCHMARK_COMPETITION_PK = 2**31 - 1
+
+
+class BenchmarkConsumer(QuizConsumer):
+    async def send(self, text_data=None, bytes_data=None, close=False):
+        self.received_at = asyncio.get_running_loop().time()
+
+
+class ThreadHopConsumer(BenchmarkConsumer):
+    """
+    The previous path, the eligibility check hops to the sync thread.
+    """
+
+    @database_sync_to_async
+    def is_user_eligible_to_participate(self):
+        return is_user_eligible_to_participate(
+            user_profile=self.user_profile, competition=self.competition
+        )
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the per socket latency of a question broadcast on one node"
+
+    modes = {"async": BenchmarkConsumer, "thread_hop": ThreadHopConsumer}
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sockets", type=int, nargs="+", default=[1000, 5000, 10000]
+        )
+        parser.add_argument("--events", type=int, default=5)
+        parser.add_argument(
+            "--modes", nargs="+", choices=list(self.modes), default=list(self.modes)
+        )
+
+    def prepare(self, sockets: int):
+        pk = BENCHMARK_COMPETITION_PK
+        payload = json.dumps({"question": {"number": 1}, "type": "new_question"})
+
+        version = get_question_payloads_version(pk)
+
+        cache.set_many(
+            {
+                question_payloads_key(pk, version): [1],
+                question_payload_key(pk, version, 1): (payload, payload),
+                **{
+                    progress_key(pk, profile_pk): 0
+                    for profile_pk in range(1, sockets + 1)
+                },
+            },
+            INDEX_TIMEOUT,
+        )
+
+        return Competition(
+            pk=pk,
+            start_at=timezone.now() - timezone.timedelta(seconds=1),
+            is_active=True,
+            question_count=1,
+        )
+
+    def cleanup(self, sockets: int):
+        pk = BENCHMARK_COMPETITION_PK
+
+        version = get_question_payloads_version(pk)
+
+        forget_question_payloads(pk)
+        cache.delete_many(
+            [question_payloads_key(pk, version), question_payload_key(pk, version, 1)]
+            + [progress_key(pk, profile_pk) for profile_pk in range(1, sockets + 1)]
+        )
+
+    async def broadcast(self, competition, consumer_class, sockets: int, events: int):
+        consumers = []
+
+        for profile_pk in range(1, sockets + 1):
+            consumer = consumer_class()
+            consumer.competition_id = competition.pk
+            consumer.competition = competition
+            consumer.user_profile = UserProfile(pk=profile_pk)
+            consumer.user_competition = None  # type: ignore
+            consumers.append(consumer)
+
+        loop = asyncio.get_running_loop()
+        latencies = []
+
+        for _ in range(events):
+            sent_at = loop.time()
+
+            # the fan out of the broadcast hub
+            await asyncio.gather(
+                *(
+                    consumer.dispatch({"type": "send_question", "data": 1})
+                    for consumer in consumers
+                )
+            )
+
+            latencies += [
+                (consumer.received_at - sent_at) * 1000 for consumer in consumers
+            ]
+
+        return latencies
+
+    def handle(self, *args, **options):
+        for sockets in options["sockets"]:
+            competition = self.prepare(sockets)
+
+            try:
+                for mode in options["modes"]:
+                    latencies = asyncio.run(
+                        self.broadcast(
+                            competition,
+                            self.modes[mode],
+                            sockets,
+                            options["events"],
+                        )
+                    )
+                    percentiles = statistics.quantiles(latencies, n=100)
+
+                    self.stdout.write(
+                        f"{sockets:>6} sockets  {mode:<10}  "
+                        f"p50 {percentiles[49]:8.1f} ms  "
+                        f"p95 {percentiles[94]:8.1f} ms  "
+                        f"p99 {percentiles[98]:8.1f} ms  "
+                        f"max {max(latencies):8.1f} ms"
+                    )
+            finally:
+                self.cleanup(sockets)
@@ -0,0 +1,56 @@
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+from djangorestframework_camel_case.render import CamelCaseJSONRenderer
+
+from core.renderers import CamelCaseORJSONRenderer
+from quiz.models import Competition, Question
+from quiz.serializers import CompetitionSerializer, QuestionSerializer
+
+
+class Command(BaseCommand):
+    help = "Compares the camelCase renderers on real competition and question payloads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--number", type=int, default=2000)
+
+    def get_payloads(self):
+        question = (
+            Question.objects.select_related("competition")
+            .order_by("-pk")
+            .first()
+        )
+
+        if question is None:
+            raise CommandError("Create a competition with questions to benchmark.")
+
+        competitions = Competition.objects.filter(is_active=True).order_by(
+            "-created_at"
+        )
+
+        return {
+            "competition list": {
+                "type": "competition_list",
+                "data": CompetitionSerializer(competitions, many=True).data,
+            },
+            "question": {
+                "type": "new_question",
+                "question": QuestionSerializer(question).data,
+            },
+        }
+
+    def handle(self, *args, **options):
+        number = options["number"]
+        renderers = {
+            "CamelCaseJSONRenderer": CamelCaseJSONRenderer(),
+            "CamelCaseORJSONRenderer": CamelCaseORJSONRenderer(),
+        }
+
+        for name, payload in self.get_payloads().items():
+            for renderer_name, renderer in renderers.items():
+                seconds = timeit.timeit(lambda: renderer.render(payload), number=number)
+
+                self.stdout.write(
+                    f"{name:<18} {renderer_name:<25} "
+                    f"{seconds / number * 1_000_000:9.1f} us per message"
+                )
@@ -0,0 +1,21 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from quiz.scheduler import RoundScheduler
+
+
+class Command(BaseCommand):
+    help = "Runs the asyncio scheduler that broadcasts the competition rounds"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--poll-seconds", type=float, default=None)
+        parser.add_argument("--lookahead-seconds", type=float, default=None)
+
+    def handle(self, *args, **options):
+        scheduler = RoundScheduler(
+            poll_seconds=options["poll_seconds"],
+            lookahead_seconds=options["lookahead_seconds"],
+        )
+
+        asyncio.run(scheduler.run())
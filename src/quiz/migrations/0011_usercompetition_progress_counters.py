@@ -0,0 +1,64 @@
+# Generated by Django 5.1.15 on 2026-10-17 11:37
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Q
+
+
+def fill_progress_counters(apps, schema_editor):
+    UserCompetition = apps.get_model("quiz", "UserCompetition")
+
+    participants = UserCompetition.objects.annotate(
+        correct_answers=Count(
+            "users_answer", filter=Q(users_answer__selected_choice__is_correct=True)
+        ),
+        last_answered=Max("users_answer__question__number"),
+        eliminated_at=Min(
+            "users_answer__question__number",
+            filter=Q(users_answer__selected_choice__is_correct=False),
+        ),
+    )
+
+    updated = []
+
+    for participant in participants.iterator():
+        participant.correct_answer_count = participant.correct_answers
+        participant.last_answered_number = participant.last_answered or 0
+        participant.eliminated_at_question = participant.eliminated_at
+        updated.append(participant)
+
+    UserCompetition.objects.bulk_update(
+        updated,
+        ["correct_answer_count", "last_answered_number", "eliminated_at_question"],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0006_userprofile_unique_wallet_address_case_insensitive_and_more'),
+        ('quiz', '0010_competition_split_prize'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usercompetition',
+            name='correct_answer_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='usercompetition',
+            name='eliminated_at_question',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='usercompetition',
+            name='last_answered_number',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='usercompetition',
+            index=models.Index(fields=['competition', 'correct_answer_count'], name='quiz_uc_correct_count_idx'),
+        ),
+        migrations.RunPython(fill_progress_counters, migrations.RunPython.noop),
+    ]
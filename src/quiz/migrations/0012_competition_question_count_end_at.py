@@ -0,0 +1,54 @@
+# Generated by Django 5.1.15 on 2026-10-17 12:12
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Count
+
+from quiz.constants import ANSWER_TIME_SECOND, REST_BETWEEN_EACH_QUESTION_SECOND
+
+
+def fill_question_counts(apps, schema_editor):
+    Competition = apps.get_model("quiz", "Competition")
+
+    competitions = Competition.objects.annotate(questions_count=Count("questions"))
+
+    updated = []
+
+    for competition in competitions.iterator():
+        competition.question_count = competition.questions_count
+        competition.end_at = competition.start_at + timedelta(
+            seconds=competition.questions_count
+            * (ANSWER_TIME_SECOND + REST_BETWEEN_EACH_QUESTION_SECOND)
+        )
+        updated.append(competition)
+
+    Competition.objects.bulk_update(
+        updated, ["question_count", "end_at"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0006_userprofile_unique_wallet_address_case_insensitive_and_more'),
+        ('quiz', '0011_usercompetition_progress_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='competition',
+            name='end_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='competition',
+            name='question_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='competition',
+            index=models.Index(fields=['is_active', 'start_at', 'end_at'], name='quiz_comp_active_range_idx'),
+        ),
+        migrations.RunPython(fill_question_counts, migrations.RunPython.noop),
+    ]
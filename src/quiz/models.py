@@ -1,11 +1,10 @@
-from datetime import timedelta
-import math
 from django.core.validators import MinValueValidator
 from django.db import models
 from django.utils import timezone
-from django.db.models import F, Count
+from django.db.models import F
+from django.db.models.functions import Greatest
 from authentication.models import UserProfile
-from .constants import ANSWER_TIME_SECOND, REST_BETWEEN_EACH_QUESTION_SECOND
+from .clock import RoundClock, get_duration, get_round_clock
 from core.fields import BigNumField
 from cloudflare_images.field import CloudflareImagesField
 
@@ -21,22 +20,13 @@ class Sponsor(models.Model):
 
 
 class CompetitionManager(models.Manager):
-    def with_question_count(self):
-        return self.annotate(question_count=Count("questions"))
-
     @property
     def not_started(self):
         return self.filter(start_at__gt=timezone.now())
 
     @property
     def finished(self):
-        return self.with_question_count().filter(
-            start_at__lt=timezone.now()
-            - timezone.timedelta(
-                seconds=F("questions__count")
-                * (ANSWER_TIME_SECOND + REST_BETWEEN_EACH_QUESTION_SECOND)
-            )
-        )
+        return self.filter(end_at__lt=timezone.now())
 
     @property
     def started(self):
@@ -45,16 +35,20 @@ class CompetitionManager(models.Manager):
     @property
     def in_progress(self):
         # Competitions that have started but not yet finished
-        return (
-            self.with_question_count()
-            .filter(start_at__lte=timezone.now())
-            .filter(
-                start_at__gt=timezone.now()
-                - timezone.timedelta(
-                    seconds=F("question_count")
-                    * (ANSWER_TIME_SECOND + REST_BETWEEN_EACH_QUESTION_SECOND)
-                )
-            )
+        now = timezone.now()
+
+        return self.filter(start_at__lte=now, end_at__gt=now)
+
+    def sync_question_count(self, competition_pk: int):
+        """
+        Stores the question count and the end time of the competition after
+        its questions changed.
+        """
+        question_count = Question.objects.filter(competition_id=competition_pk).count()
+
+        return self.filter(pk=competition_pk).update(
+            question_count=question_count,
+            end_at=F("start_at") + get_duration(question_count),
         )
 
 
@@ -93,42 +87,54 @@ class Competition(models.Model):
 
     is_active = models.BooleanField(default=True)
 
+    # kept in sync with the questions, the status checks don't count them
+    question_count = models.PositiveIntegerField(default=0, editable=False)
+    end_at = models.DateTimeField(null=True, blank=True, editable=False)
+
     objects: CompetitionManager = CompetitionManager()
     questions: models.QuerySet["Question"]
     hint_count = models.PositiveIntegerField(default=1)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["is_active", "start_at", "end_at"],
+                name="quiz_comp_active_range_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.user_profile} - {self.title}"
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+
+        if update_fields is None or "start_at" in update_fields:
+            if self.pk:
+                self.question_count = self.questions.count()
+
+            self.end_at = self.clock.end_at
+
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "question_count", "end_at"}
+
+        super().save(*args, **kwargs)
+
+    @property
+    def clock(self) -> RoundClock:
+        return get_round_clock(self.start_at, self.question_count)
+
     @property
     def is_in_progress(self):
-        return self.can_be_shown and (
-            self.start_at
-            + timedelta(
-                seconds=(
-                    self.questions.count()
-                    * (ANSWER_TIME_SECOND + REST_BETWEEN_EACH_QUESTION_SECOND)
-                    - REST_BETWEEN_EACH_QUESTION_SECOND
-                )
-            )
-            >= timezone.now()
-        )
+        return self.clock.is_in_progress(timezone.now())
 
     @property
     def can_be_shown(self):
-        return self.start_at <= timezone.now()
+        return self.clock.is_started(timezone.now())
 
     @property
     def is_finished(self):
-        return (
-            not self.is_in_progress
-            and self.start_at
-            + timezone.timedelta(
-                seconds=self.questions.count()
-                * (ANSWER_TIME_SECOND + REST_BETWEEN_EACH_QUESTION_SECOND)
-            )
-            <= timezone.now()
-        )
+        return self.clock.is_finished(timezone.now())
 
 
 class UserCompetitionManager(models.Manager):
@@ -136,10 +142,7 @@ class UserCompetitionManager(models.Manager):
         if not competition.is_active:
             return self.none()
 
-        state = math.floor(
-            (timezone.now() - competition.start_at).seconds
-            / (ANSWER_TIME_SECOND + REST_BETWEEN_EACH_QUESTION_SECOND)
-        )
+        state = competition.clock.completed_rounds(timezone.now())
 
         return self.annotate().filter(
             competition=competition,
@@ -147,6 +150,39 @@ class UserCompetitionManager(models.Manager):
             user_answer__gte=state,
         )
 
+    def record_answers(
+        self, user_competition_pks: list[int], question_number: int, is_correct: bool
+    ):
+        """
+        Moves the progress counters of the given participants forward in a
+        single conditional update, answers already counted are skipped.
+        """
+        participants = self.filter(pk__in=user_competition_pks)
+
+        if is_correct:
+            return participants.filter(
+                last_answered_number__lt=question_number
+            ).update(
+                correct_answer_count=F("correct_answer_count") + 1,
+                last_answered_number=question_number,
+            )
+
+        return participants.filter(eliminated_at_question__isnull=True).update(
+            last_answered_number=Greatest("last_answered_number", question_number),
+            eliminated_at_question=question_number,
+        )
+
+    def use_hint(self, user_competition_pk: int) -> bool:
+        """
+        Spends one hint of the participant in a single conditional update,
+        concurrent requests can't spend more hints than are left.
+        """
+        return bool(
+            self.filter(pk=user_competition_pk, hint_count__gt=0).update(
+                hint_count=F("hint_count") - 1
+            )
+        )
+
 
 class UserCompetition(models.Model):
     user_profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE)
@@ -155,10 +191,21 @@ class UserCompetition(models.Model):
     amount_won = BigNumField(default=0)
     hint_count = models.PositiveIntegerField(default=0)
     tx_hash = models.CharField(max_length=1000, blank=True)
+    correct_answer_count = models.PositiveIntegerField(default=0)
+    last_answered_number = models.PositiveIntegerField(default=0)
+    eliminated_at_question = models.PositiveIntegerField(null=True, blank=True)
     users_answer: models.QuerySet
 
+    objects: UserCompetitionManager = UserCompetitionManager()
+
     class Meta:
         unique_together = ("user_profile", "competition")
+        indexes = [
+            models.Index(
+                fields=["competition", "correct_answer_count"],
+                name="quiz_uc_correct_count_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user_profile} - {self.competition.title}"
@@ -185,26 +232,11 @@ class Question(models.Model):
 
     @property
     def can_be_shown(self):
-        return (
-            self.competition.start_at
-            + timezone.timedelta(
-                seconds=(self.number - 1)
-                * (ANSWER_TIME_SECOND + REST_BETWEEN_EACH_QUESTION_SECOND)
-            )
-            <= timezone.now()
-        )
+        return self.competition.clock.is_question_shown(self.number, timezone.now())
 
     @property
     def answer_can_be_shown(self):
-        answer_time = ANSWER_TIME_SECOND - 2
-
-        seconds = (self.number - 1) * (
-            ANSWER_TIME_SECOND + REST_BETWEEN_EACH_QUESTION_SECOND
-        ) + answer_time
-
-        return (
-            self.competition.start_at + timezone.timedelta(seconds=seconds)
-        ) <= timezone.now()
+        return self.competition.clock.is_answer_revealed(self.number, timezone.now())
 
     objects: QuestionManager = QuestionManager()
 
@@ -0,0 +1,162 @@
+"""
+Pre-rendered question payloads.
+
+Every question of a competition is rendered to its final camelCase wire text
+before the competition starts, once for eligible and once for not eligible
+participants, so broadcasting a question does no ORM or renderer work.
+"""
+
+import time
+
+from django.core.cache import cache
+
+from core.renderers import render_camel_json
+from quiz.models import Competition, Question
+from quiz.serializers import BroadcastQuestionSerializer
+
+
+QUESTION_PAYLOAD_TIMEOUT = 60 * 60 * 24
+
+# processes keep the payloads they read and check every few seconds that the
+# version they were rendered for is still the current one, a question saved
+# on another node is picked up within that time
+LOCAL_QUESTION_PAYLOAD_SECONDS = 5
+
+# (competition pk, question number) -> (version, checked at, payloads)
+_question_payloads: dict[tuple[int, int], tuple[int, float, tuple[str, str]]] = {}
+
+
+def question_payloads_version_key(competition_pk: int):
+    return f"quiz_{competition_pk}_question_payloads_version"
+
+
+def question_payloads_key(competition_pk: int, version: int):
+    # question numbers the payloads of the version were rendered for
+    return f"quiz_{competition_pk}_question_payloads_{version}"
+
+
+def question_payload_key(competition_pk: int, version: int, question_number: int):
+    return f"quiz_{competition_pk}_question_payload_{version}_{question_number}"
+
+
+def get_question_payloads_version(competition_pk: int) -> int:
+    return cache.get(question_payloads_version_key(competition_pk), 0)
+
+
+def render_question_payload(question: Question, total_participants_count: int):
+    data = BroadcastQuestionSerializer(
+        instance=question,
+        context={"total_participants_count": total_participants_count},
+    ).data
+
+    return tuple(
+        render_camel_json(
+            {
+                "question": {**data, "is_eligible": is_eligible},
+                "type": "new_question",
+            }
+        )
+        for is_eligible in (False, True)
+    )
+
+
+def build_question_payloads(competition: Competition):
+    version = get_question_payloads_version(competition.pk)
+    questions = (
+        Question.objects.filter(competition=competition)
+        .select_related("competition")
+        .prefetch_related("choices")
+    )
+    total_participants_count = competition.participants.count()
+
+    payloads = {
+        question.number: render_question_payload(question, total_participants_count)
+        for question in questions
+    }
+
+    cache.set_many(
+        {
+            question_payloads_key(competition.pk, version): list(payloads),
+            **{
+                question_payload_key(competition.pk, version, number): payload
+                for number, payload in payloads.items()
+            },
+        },
+        QUESTION_PAYLOAD_TIMEOUT,
+    )
+
+    checked_at = time.monotonic()
+
+    for number, payload in payloads.items():
+        _question_payloads[(competition.pk, number)] = (version, checked_at, payload)
+
+    return payloads
+
+
+def get_cached_question_payload(competition_pk: int, question_number: int):
+    """
+    The payloads of the question kept by this process, None when there are
+    none or their version is due to be checked.
+    """
+    local = _question_payloads.get((competition_pk, question_number))
+
+    if local is None or time.monotonic() - local[1] > LOCAL_QUESTION_PAYLOAD_SECONDS:
+        return None
+
+    return local[2]
+
+
+def load_question_payload(competition_pk: int, question_number: int):
+    """
+    The payloads of the question for the current version, rendered if they
+    aren't cached yet. None when the competition has no such question.
+    """
+    version = get_question_payloads_version(competition_pk)
+    local = _question_payloads.get((competition_pk, question_number))
+
+    if local is not None and local[0] == version:
+        _question_payloads[(competition_pk, question_number)] = (
+            version,
+            time.monotonic(),
+            local[2],
+        )
+        return local[2]
+
+    cached = cache.get_many(
+        [
+            question_payloads_key(competition_pk, version),
+            question_payload_key(competition_pk, version, question_number),
+        ]
+    )
+    payload = cached.get(question_payload_key(competition_pk, version, question_number))
+
+    if payload is None and question_payloads_key(competition_pk, version) not in cached:
+        competition = Competition.objects.get(pk=competition_pk)
+        payload = build_question_payloads(competition).get(question_number)
+
+    if payload is None:
+        _question_payloads.pop((competition_pk, question_number), None)
+        return None
+
+    _question_payloads[(competition_pk, question_number)] = (
+        version,
+        time.monotonic(),
+        payload,
+    )
+
+    return payload
+
+
+def invalidate_question_payloads(competition_pk: int):
+    """
+    Moves the competition to a new payloads version, every process renders or
+    reads the payloads again once it checks the version of its own.
+    """
+    cache.add(question_payloads_version_key(competition_pk), 0, None)
+    cache.incr(question_payloads_version_key(competition_pk))
+    forget_question_payloads(competition_pk)
+
+
+def forget_question_payloads(competition_pk: int):
+    for key in [key for key in _question_payloads if key[0] == competition_pk]:
+        del _question_payloads[key]
@@ -18,7 +18,9 @@ class IsEligibleToAnswer(BasePermission):
         user_profile = request.user.profile
         
         try:
-            user_competition = UserCompetition.objects.get(pk=user_competition_pk)
+            user_competition = UserCompetition.objects.select_related(
+                "competition"
+            ).get(pk=user_competition_pk)
             return is_user_eligible_to_participate(
                 user_profile, user_competition.competition
             )
@@ -0,0 +1,439 @@
+"""
+Asyncio round scheduler.
+
+Drives the rounds of many competitions concurrently in a single event loop.
+Every broadcast is scheduled against a deadline derived from ``start_at`` so
+time spent on the database or the channel layer never delays the next round.
+Events are stamped with their intended and actual send time and the skew
+between the two is recorded per round. Several scheduler nodes can run at
+once, a lease per competition makes sure only one of them drives it.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.utils import timezone
+
+from core.metrics import aobserve
+from core.utils import memcache_lock, next_fencing_token, renew_lock
+from quiz.clock import RoundClock, get_round_clock
+from quiz.constants import ANSWER_TIME_SECOND, REST_BETWEEN_EACH_QUESTION_SECOND
+from quiz.events import append_event
+from quiz.models import Competition
+from quiz.broadcast import broadcast
+from quiz.checkpoints import (
+    CLAIMED,
+    FINISHED,
+    RoundCheckpoint,
+    round_driver_lease_key,
+)
+from quiz.tasks import (
+    calculate_winners,
+    close_round,
+    distribute_prize,
+    prepare_competition,
+)
+from quiz.utils import get_quiz_stats, get_winners_list
+
+
+logger = logging.getLogger(__name__)
+
+
+# seconds between the end of the answer window and the round stats broadcast
+STATS_DELAY_SECOND = 1
+
+SKEW_WARNING_MS = 250
+
+
+def broadcast_skew_name(competition_pk: int, question_number: int | None = None):
+    if question_number is None:
+        return f"quiz_{competition_pk}_broadcast_skew_ms"
+
+    return f"quiz_{competition_pk}_round_{question_number}_broadcast_skew_ms"
+
+
+class CompetitionCancelled(Exception):
+    pass
+
+
+def run_sync(func):
+    # competitions don't share the single sync thread so they don't queue
+    # behind each other's database work
+    return database_sync_to_async(func, thread_sensitive=False)
+
+
+class CompetitionRoundDriver:
+    def __init__(
+        self,
+        competition_pk: int,
+        channel_layer=None,
+        answer_seconds: float = ANSWER_TIME_SECOND,
+        rest_seconds: float = REST_BETWEEN_EACH_QUESTION_SECOND,
+        stats_delay_seconds: float = STATS_DELAY_SECOND,
+    ):
+        self.competition_pk = competition_pk
+        self.channel_layer = channel_layer or get_channel_layer()
+        self.answer_seconds = answer_seconds
+        self.rest_seconds = rest_seconds
+        self.stats_delay_seconds = stats_delay_seconds
+        self.group_name = f"quiz_{competition_pk}"
+        self.lease_key = round_driver_lease_key(competition_pk)
+        self.fencing_token: int | None = None
+        self.lease_lost = False
+
+    def get_clock(self, competition: Competition) -> RoundClock:
+        return RoundClock(
+            competition.start_at,
+            competition.question_count,
+            self.answer_seconds,
+            self.rest_seconds,
+        )
+
+    def sync_clock(self):
+        """
+        Anchors the wall clock deadlines to the monotonic clock of the loop so
+        clock adjustments and slow steps don't accumulate as drift.
+        """
+        self.clock_anchor = (timezone.now(), asyncio.get_running_loop().time())
+
+    def to_monotonic(self, deadline) -> float:
+        wall_clock, monotonic = self.clock_anchor
+
+        return monotonic + (deadline - wall_clock).total_seconds()
+
+    async def sleep_until(self, deadline):
+        delay = self.to_monotonic(deadline) - asyncio.get_running_loop().time()
+
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def group_send(
+        self, event_type: str, data, deadline=None, question_number: int = 0
+    ):
+        event = {"type": event_type, "data": data, "fence": self.fencing_token}
+
+        if deadline is None:
+            event = await append_event(self.competition_pk, event)
+            await broadcast(self.channel_layer, self.group_name, event)
+            return
+
+        skew = asyncio.get_running_loop().time() - self.to_monotonic(deadline)
+
+        event["intended_at"] = deadline.timestamp()
+        event["sent_at"] = event["intended_at"] + skew
+
+        event = await append_event(self.competition_pk, event)
+        await broadcast(self.channel_layer, self.group_name, event)
+        await self.record_skew(event_type, question_number, skew * 1000)
+
+    async def record_skew(self, event_type: str, question_number: int, skew_ms: float):
+        if skew_ms > SKEW_WARNING_MS:
+            logger.warning(
+                f"{event_type} of round {question_number} of {self.group_name} "
+                f"was sent {skew_ms:.0f}ms late."
+            )
+
+        try:
+            await aobserve(
+                broadcast_skew_name(self.competition_pk, question_number), skew_ms
+            )
+            await aobserve(broadcast_skew_name(self.competition_pk), skew_ms)
+        except Exception:
+            logger.exception("Failed to record the broadcast skew.")
+
+    def is_past(self, deadline):
+        return asyncio.get_running_loop().time() >= self.to_monotonic(deadline)
+
+    @run_sync
+    def load_competition(self):
+        return Competition.objects.filter(pk=self.competition_pk, is_active=True).first()
+
+    async def run_step(self, step: str, coroutine):
+        """
+        Runs the step unless a previous driver of the competition already did.
+        """
+        if self.checkpoint.is_done(step):
+            coroutine.close()
+            return
+
+        if await self.checkpoint.is_cancelled():
+            coroutine.close()
+            raise CompetitionCancelled(self.competition_pk)
+
+        await coroutine
+        await self.checkpoint.mark(step)
+
+    async def run(self):
+        owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        lease_seconds = settings.ROUND_DRIVER_LEASE_SECONDS
+
+        with memcache_lock(self.lease_key, owner, lease_seconds) as acquired:
+            if not acquired:
+                logger.info(f"{self.group_name} is driven by another node.")
+                return
+
+            self.fencing_token = await run_sync(next_fencing_token)(self.lease_key)
+            lease = asyncio.create_task(
+                self.hold_lease(owner, lease_seconds, asyncio.current_task())
+            )
+
+            try:
+                await self.drive()
+            except CompetitionCancelled:
+                logger.warning(f"Competition {self.competition_pk} was cancelled.")
+            except asyncio.CancelledError:
+                if not self.lease_lost:
+                    raise
+
+                logger.error(f"Lost the lease of {self.group_name}, stopped driving.")
+            finally:
+                lease.cancel()
+
+    async def hold_lease(self, owner: str, lease_seconds: float, driver_task):
+        while True:
+            await asyncio.sleep(lease_seconds / 3)
+
+            try:
+                renewed = await run_sync(renew_lock)(
+                    self.lease_key, owner, lease_seconds
+                )
+            except Exception:
+                # a renewal that can't be confirmed counts as a lost lease
+                logger.exception(f"Failed to renew the lease of {self.group_name}.")
+                renewed = False
+
+            if not renewed:
+                self.lease_lost = True
+                driver_task.cancel()
+                return
+
+    async def drive(self):
+        competition = await self.load_competition()
+
+        if competition is None:
+            logger.warning(f"Competition with pk {self.competition_pk} not exists.")
+            return
+
+        self.checkpoint = await RoundCheckpoint(self.competition_pk).load()
+
+        if self.checkpoint.is_finished:
+            return
+
+        is_resumed = self.checkpoint.is_started
+        await self.checkpoint.mark(CLAIMED)
+
+        warm_up = timezone.timedelta(seconds=settings.COMPETITION_WARM_UP_SECONDS)
+
+        self.sync_clock()
+        await self.sleep_until(competition.start_at - warm_up)
+
+        # pick up the changes made while waiting
+        competition = await self.load_competition()
+        self.sync_clock()
+
+        if competition is None:
+            logger.warning(f"Competition {self.competition_pk} was deactivated.")
+            return
+
+        if competition.start_at - timezone.now() > warm_up * 2:
+            logger.warning(f"Competition {self.competition_pk} was postponed.")
+            return
+
+        if is_resumed:
+            logger.warning(f"Resuming competition {self.competition_pk}.")
+
+        # caches are rebuilt on resume as well, another node may have warmed them
+        await run_sync(prepare_competition)(competition)
+        question_count = competition.question_count
+
+        logger.info(
+            f"Competition {self.competition_pk} starts at {competition.start_at}, "
+            f"broadcasting {question_count} questions."
+        )
+
+        for question_number in range(1, question_count + 1):
+            await self.run_round(competition, question_number)
+
+        await self.finish(competition, question_count)
+
+    async def run_round(self, competition: Competition, question_number: int):
+        clock = self.get_clock(competition)
+        round_start = clock.round_start(question_number)
+        stats_at = round_start + timezone.timedelta(
+            seconds=self.answer_seconds + self.stats_delay_seconds
+        )
+        next_round_start = clock.round_start(question_number + 1)
+
+        # a resumed driver skips the events of the rounds it missed
+        if not self.is_past(stats_at):
+            await self.run_step(
+                f"question_{question_number}",
+                self.publish_question(round_start, question_number),
+            )
+
+        if not self.is_past(next_round_start):
+            await self.run_step(
+                f"stats_{question_number}",
+                self.publish_round_stats(competition, stats_at, question_number),
+            )
+
+    async def publish_question(self, round_start, question_number: int):
+        await self.sleep_until(round_start)
+
+        logger.info(f"broadcasting question {question_number} of {self.group_name}.")
+        await self.group_send(
+            "send_question", question_number, round_start, question_number
+        )
+
+    async def publish_round_stats(
+        self, competition: Competition, stats_at, question_number: int
+    ):
+        await self.sleep_until(stats_at)
+
+        stats = await run_sync(close_round)(competition, question_number)
+        await self.group_send("send_quiz_stats", stats, stats_at, question_number)
+
+    async def finish(self, competition: Competition, question_count: int):
+        finish_at = self.get_clock(competition).round_start(question_count + 1)
+
+        await self.sleep_until(finish_at)
+
+        logger.info(f"Competition {self.competition_pk} finished.")
+
+        winners, win_amount = await run_sync(calculate_winners)(competition)
+
+        await self.run_step("payout", self.submit_payout(competition, winners, win_amount))
+
+        # shipped with the event so the sockets don't query the winners
+        winners_list = await run_sync(get_winners_list)(competition)
+
+        await self.run_step(
+            "finish_quiz",
+            self.group_send(
+                "finish_quiz",
+                {"winners_list": winners_list},
+                finish_at,
+                question_count + 1,
+            ),
+        )
+        await self.run_step(
+            "final_stats", self.publish_final_stats(competition, finish_at, question_count)
+        )
+        await self.checkpoint.mark(FINISHED)
+
+    async def submit_payout(self, competition: Competition, winners, win_amount):
+        # the payout must never be sent twice, if a previous driver died while
+        # submitting it the transaction has to be checked by hand
+        if self.checkpoint.is_done("payout_started"):
+            logger.error(
+                f"Payout of competition {self.competition_pk} was interrupted, "
+                "verify the distribution transaction manually."
+            )
+            return
+
+        await self.checkpoint.mark("payout_started")
+        await run_sync(distribute_prize)(
+            competition, winners, win_amount, self.fencing_token
+        )
+
+    async def publish_final_stats(
+        self, competition: Competition, finish_at, question_count: int
+    ):
+        await self.group_send(
+            "send_quiz_stats",
+            await run_sync(get_quiz_stats)(competition, refresh=True),
+            finish_at,
+            question_count + 1,
+        )
+
+
+class RoundScheduler:
+    """
+    Long running service that picks up the competitions about to start, or the
+    ones whose driver died mid competition, and drives each one of them in its
+    own asyncio task. A dead driver keeps its lease until it expires, another
+    node takes over within ``ROUND_DRIVER_LEASE_SECONDS`` plus a poll.
+    """
+
+    # how long after start_at an interrupted competition is still resumed
+    resume_window_seconds = 60 * 60 * 6
+
+    def __init__(self, poll_seconds=None, lookahead_seconds=None):
+        self.poll_seconds = poll_seconds or settings.ROUND_SCHEDULER_POLL_SECONDS
+        self.lookahead_seconds = (
+            lookahead_seconds or settings.ROUND_SCHEDULER_LOOKAHEAD_SECONDS
+        )
+        self.channel_layer = get_channel_layer()
+        self.drivers: dict[int, asyncio.Task] = {}
+
+    @run_sync
+    def get_competitions_to_drive(self) -> list[tuple[int, bool]]:
+        """
+        Competitions starting within the lookahead and the started ones that
+        may need to be resumed, along with whether they have ended.
+        """
+        now = timezone.now()
+
+        competitions = Competition.objects.filter(
+            is_active=True,
+            start_at__lte=now + timezone.timedelta(seconds=self.lookahead_seconds),
+            start_at__gte=now - timezone.timedelta(seconds=self.resume_window_seconds),
+        ).values_list("pk", "start_at", "question_count", "end_at")
+
+        return [
+            # ``end_at`` is missing on rows written without ``save``
+            (pk, (end_at or get_round_clock(start_at, question_count).end_at) <= now)
+            for pk, start_at, question_count, end_at in competitions
+        ]
+
+    async def should_drive(self, competition_pk: int, has_ended: bool):
+        if competition_pk in self.drivers:
+            return False
+
+        checkpoint = await RoundCheckpoint(competition_pk).load()
+
+        if checkpoint.is_finished:
+            return False
+
+        # running competitions are picked up even if their driver died in the
+        # warm up or no scheduler was up at start_at, the ended ones only if
+        # a driver claimed them
+        return not has_ended or checkpoint.is_started
+
+    def start_driver(self, competition_pk: int):
+        driver = CompetitionRoundDriver(competition_pk, self.channel_layer)
+        task = asyncio.create_task(driver.run(), name=f"competition_{competition_pk}")
+        task.add_done_callback(lambda task: self.on_driver_done(competition_pk, task))
+
+        self.drivers[competition_pk] = task
+
+    def on_driver_done(self, competition_pk: int, task: asyncio.Task):
+        self.drivers.pop(competition_pk, None)
+
+        if not task.cancelled() and task.exception():
+            logger.error(
+                f"Round driver of competition {competition_pk} failed.",
+                exc_info=task.exception(),
+            )
+
+    async def schedule_competitions(self):
+        for competition_pk, has_ended in await self.get_competitions_to_drive():
+            if await self.should_drive(competition_pk, has_ended):
+                self.start_driver(competition_pk)
+
+    async def run(self):
+        logger.info("Round scheduler started.")
+
+        while True:
+            try:
+                await self.schedule_competitions()
+            except Exception:
+                logger.exception("Failed to schedule the upcoming competitions.")
+
+            await asyncio.sleep(self.poll_seconds)
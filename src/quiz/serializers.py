@@ -21,7 +21,7 @@ class SmallQuestionSerializer(serializers.ModelSerializer):
 class CompetitionSerializer(serializers.ModelSerializer):
     questions = SmallQuestionSerializer(many=True, read_only=True)
     sponsors = SponsorSerializer(many=True, read_only=True)
-    participants_count = serializers.IntegerField(source='participants.count', read_only=True)
+    participants_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Competition
@@ -29,6 +29,13 @@ class CompetitionSerializer(serializers.ModelSerializer):
             "participants",
         )
 
+    def get_participants_count(self, competition: Competition) -> int:
+        # annotated by the querysets listing many competitions
+        if hasattr(competition, "participants_count"):
+            return competition.participants_count  # type: ignore
+
+        return competition.participants.count()
+
 
 class ChoiceSerializer(serializers.ModelSerializer):
     is_correct = serializers.SerializerMethodField()
@@ -105,6 +112,25 @@ class QuestionSerializer(serializers.ModelSerializer):
                 return prize_amount / remain_participants_count
 
 
+class BroadcastQuestionSerializer(QuestionSerializer):
+    """
+    The question as it is broadcast when its round begins, nobody has answered
+    it yet and the participants count comes from the context.
+    """
+
+    is_eligible = None
+
+    def get_remain_participants_count(self, ques: Question):
+        return 0
+
+    def get_total_participants_count(self, ques: Question):
+        return self.context["total_participants_count"]
+
+    def get_amount_won_per_user(self, ques: Question):
+        if ques.competition.is_active:
+            return ques.competition.prize_amount
+
+
 class CompetitionField(serializers.PrimaryKeyRelatedField):
     def to_representation(self, value):
         pk = super(CompetitionField, self).to_representation(value)
@@ -149,7 +175,10 @@ class UserCompetitionSerializer(serializers.ModelSerializer):
             "user_profile",
             "is_winner",
             "amount_won",
-            "tx_hash"
+            "tx_hash",
+            "correct_answer_count",
+            "last_answered_number",
+            "eliminated_at_question",
         ]
 
     def create(self, validated_data):
@@ -173,6 +202,36 @@ class UserCompetitionField(serializers.PrimaryKeyRelatedField):
             return None
 
 
+class PrerenderedUserCompetitionSerializer(UserCompetitionSerializer):
+    """
+    Same output as ``UserCompetitionSerializer``, the competition is rendered
+    once by the caller and passed in the context.
+    """
+
+    competition = serializers.SerializerMethodField()
+
+    def get_competition(self, user_competition: UserCompetition):
+        return self.context["competition"]
+
+
+def serialize_user_competition(
+    user_competition: UserCompetition | None, competition_data: dict | None = None
+):
+    """
+    ``user_competition`` of the answers sent to the sockets, as
+    ``UserAnswerSerializer`` renders it.
+    """
+    if user_competition is None:
+        return None
+
+    if competition_data is None:
+        competition_data = CompetitionSerializer(user_competition.competition).data
+
+    return PrerenderedUserCompetitionSerializer(
+        user_competition, context={"competition": competition_data}
+    ).data
+
+
 class UserAnswerSerializer(serializers.ModelSerializer):
     user_competition = UserCompetitionField(
         queryset=UserCompetition.objects.filter(
@@ -184,3 +243,18 @@ class UserAnswerSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserAnswer
         fields = "__all__"
+
+    def validate(self, attrs):
+        question: Question = attrs["question"]
+
+        if question.competition_id != attrs["user_competition"].competition_id:  # type: ignore
+            raise serializers.ValidationError(
+                {"question": "question is not part of the competition"}
+            )
+
+        if attrs["selected_choice"].question_id != question.pk:
+            raise serializers.ValidationError(
+                {"selected_choice": "choice is not part of the question"}
+            )
+
+        return attrs
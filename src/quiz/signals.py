@@ -1,23 +1,45 @@
 import json
-from celery import current_app
+import logging
+from django.conf import settings
 from django.utils import timezone
-from django.db.models.signals import post_save, pre_delete
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django_celery_beat.models import PeriodicTask, CrontabSchedule, ClockedSchedule
-from quiz.models import Competition
+from quiz.models import Choice, Competition, Question, UserAnswer, UserCompetition
+from quiz.answer_key import get_answer_key, invalidate_answer_key
+from quiz.checkpoints import cancel_competition_driver
+from quiz.competition_list import (
+    invalidate_competition_list,
+    record_enrollment_delta,
+    render_competition_change,
+)
+from quiz.payloads import invalidate_question_payloads
+from quiz.eligibility import (
+    forget_enrollment,
+    record_answer,
+    record_enrollment,
+)
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 
 
+logger = logging.getLogger(__name__)
+
+
 @receiver(pre_delete, sender=Competition)
 def clean_competition_task(sender, instance: Competition, **kwargs):
     channel_layer = get_channel_layer()
 
-    current_app.control.revoke(f"start_competition_{instance.pk}", terminate=True)  # type: ignore
+    cancel_competition_driver(instance.pk)
+    PeriodicTask.objects.filter(name=f"start_competition_{instance.pk}").delete()
 
     async_to_sync(channel_layer.group_send)(  # type: ignore
         f"quiz_list",
-        {"type": "delete_competition", "data": instance.pk},
+        {
+            "type": "delete_competition",
+            "data": instance.pk,
+            "text": render_competition_change(instance, exclude=True),
+        },
     )
 
 
@@ -25,12 +47,19 @@ def clean_competition_task(sender, instance: Competition, **kwargs):
 def trigger_competition_starter_task(sender, instance: Competition, created, **kwargs):
     channel_layer = get_channel_layer()
 
+    # the answer deadlines follow start_at
+    invalidate_answer_key(instance.pk)
+
     async_to_sync(channel_layer.group_send)(  # type: ignore
         f"quiz_list",
-        {"type": "update_competition_data", "data": instance.pk},
+        {
+            "type": "update_competition_data",
+            "data": instance.pk,
+            "text": render_competition_change(instance),
+        },
     )
 
-    if not instance.is_active:
+    if not instance.is_active or settings.ROUND_SCHEDULER_BACKEND != "celery":
         return
 
     start_time = instance.start_at
@@ -50,7 +79,9 @@ def trigger_competition_starter_task(sender, instance: Competition, created, **k
     # Create a new crontab schedule
     clocked_schedule, created = ClockedSchedule.objects.get_or_create(
         clocked_time=start_time
-        - timezone.timedelta(seconds=10)  # or use start_time directly
+        - timezone.timedelta(
+            seconds=settings.COMPETITION_WARM_UP_SECONDS
+        )  # or use start_time directly
     )
 
     # Now create a new PeriodicTask with the new schedule
@@ -63,11 +94,95 @@ def trigger_competition_starter_task(sender, instance: Competition, created, **k
     )
 
 
-# This assumes the task is scheduled with a unique name using the competition ID.
-# current_app.control.revoke(f"start_competition_{instance.pk}", terminate=True)
+@receiver(post_save, sender=UserCompetition)
+def add_enrollment_to_eligibility_index(
+    sender, instance: UserCompetition, created, **kwargs
+):
+    if created:
+        record_enrollment(instance.competition_id, instance.user_profile_id)  # type: ignore
+
+
+@receiver(post_delete, sender=UserCompetition)
+def remove_enrollment_from_eligibility_index(
+    sender, instance: UserCompetition, **kwargs
+):
+    forget_enrollment(instance.competition_id, instance.user_profile_id)  # type: ignore
+
+
+@receiver(post_save, sender=UserCompetition)
+def count_enrollment(sender, instance: UserCompetition, created, **kwargs):
+    if created:
+        record_enrollment_delta(instance.competition_id, 1)  # type: ignore
+
+
+@receiver(post_delete, sender=UserCompetition)
+def count_unenrollment(sender, instance: UserCompetition, **kwargs):
+    record_enrollment_delta(instance.competition_id, -1)  # type: ignore
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def reset_competition_list(sender, **kwargs):
+    # questions of the snapshot, rebuilt on next connect
+    invalidate_competition_list()
+
+
+@receiver(m2m_changed, sender=Competition.sponsors.through)
+def reset_competition_list_sponsors(sender, **kwargs):
+    invalidate_competition_list()
+
+
+@receiver(post_save, sender=UserAnswer)
+def update_answer_progress(sender, instance: UserAnswer, created, **kwargs):
+    """
+    Moves the progress counters and the eligibility index of the participant,
+    the question number and correctness are read from the answer key.
+    """
+    if not created:
+        return
+
+    user_competition = instance.user_competition
+    competition_pk = user_competition.competition_id
+    question = get_answer_key(competition_pk).get(instance.question_id)  # type: ignore
+
+    if question is None:
+        # the key is stale when the questions were edited after it was built
+        invalidate_answer_key(competition_pk)  # type: ignore
+        question = get_answer_key(competition_pk).get(instance.question_id)  # type: ignore
+
+    if question is None:
+        logger.warning(
+            f"answer {instance.pk} is for question {instance.question_id} "
+            f"outside competition {competition_pk}"
+        )
+        return
+
+    is_correct = question["correct_choice"] == instance.selected_choice_id  # type: ignore
+
+    UserCompetition.objects.record_answers(
+        [user_competition.pk], question["number"], is_correct
+    )
+    record_answer(
+        competition_pk,  # type: ignore
+        user_competition.user_profile_id,  # type: ignore
+        question["number"],
+        is_correct,
+    )
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def reset_question_count(sender, instance: Question, **kwargs):
+    Competition.objects.sync_question_count(instance.competition_id)  # type: ignore
+    invalidate_answer_key(instance.competition_id)  # type: ignore
+    invalidate_question_payloads(instance.competition_id)  # type: ignore
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def reset_answer_key(sender, instance: Choice, **kwargs):
+    question = instance.question
+
+    invalidate_answer_key(question.competition_id)  # type: ignore
+    invalidate_question_payloads(question.competition_id)  # type: ignore
 
-# setup_competition_to_start.apply_async(
-#     args=[instance.pk],
-#     eta=start_time - timezone.timedelta(seconds=10),
-#     task_id=f"start_competition_{instance.pk}",
-# )  # type: ignore
@@ -1,23 +1,20 @@
-import json
-import time
-
 from celery import shared_task
-from django.core.serializers.json import DjangoJSONEncoder
-from django.db.models import Count, Q
-from django.utils import timezone
+from django.conf import settings
 from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
-from quiz.constants import (
-    ANSWER_TIME_SECOND,
-    REST_BETWEEN_EACH_QUESTION_SECOND,
+from core.utils import get_fencing_token
+from quiz.answer_key import build_answer_key
+from quiz.checkpoints import StaleFencingToken, round_driver_lease_key
+from quiz.competition_list import (
+    flush_enrollment_counts as flush_competition_enrollment_counts,
 )
+from quiz.eligibility import build_eligibility_index
+from quiz.ingestion import flush_answers
 from quiz.contracts import ContractManager, SafeContractException
-from quiz.models import Competition, Question, UserCompetition
-from quiz.serializers import QuestionSerializer
-from quiz.utils import get_quiz_question_state
+from quiz.models import Competition, UserCompetition
+from quiz.payloads import build_question_payloads
+from quiz.utils import get_quiz_stats
 
 import logging
-import threading
 
 logger = logging.getLogger(__name__)
 
@@ -41,113 +38,92 @@ def handle_quiz_end(competition: Competition, winners: list[str], amount):
     return tx
 
 
-def check_competition_state(competition: Competition):
-    pass
+@shared_task(ignore_result=True)
+def flush_enrollment_counts():
+    return flush_competition_enrollment_counts()
 
 
-def evaluate_state(competition: Competition, channel_layer, question_state):
+def check_competition_state(competition: Competition):
+    pass
 
-    logger.warning(f"sending broadcast question {question_state}.")
 
-    if competition.questions.count() < question_state:
-        logger.warning(f"no more questions remaining, broadcast quiz finished.")
+def prepare_competition(competition: Competition):
+    build_eligibility_index(competition)
+    build_answer_key(competition)
+    build_question_payloads(competition)
 
-        logger.info("calculating results")
-        question_number = get_quiz_question_state(competition)
 
-        users_participated = UserCompetition.objects.filter(competition=competition)
+def close_round(competition: Competition, question_number: int):
+    """
+    Stores the answers of the round and returns the stats of the next one.
+    """
+    flush_answers(competition.pk)
+    build_eligibility_index(competition)
 
-        winners = (
-            users_participated.annotate(
-                correct_answer_count=Count(
-                    "users_answer",
-                    filter=Q(users_answer__selected_choice__is_correct=True),
-                )
-            )
-            .filter(
-                correct_answer_count__gte=question_number,
-            )
-            .distinct()
-        )
+    return get_quiz_stats(competition, question_number + 1, refresh=True)
 
-        winners_count = winners.count()
 
-        amount_win = competition.prize_amount
+def calculate_winners(competition: Competition):
+    """
+    Stores the answers of the last round and marks the winners, returns their
+    wallets and the amount each one of them wins.
+    """
+    logger.info("calculating results")
+    flush_answers(competition.pk)
 
-        if competition.split_prize:
-            win_amount = amount_win / winners_count if winners_count > 0 else 0
-        else:
-            win_amount = amount_win
+    question_number = competition.question_count
 
-        winners.update(is_winner=True, amount_won=win_amount)
+    users_participated = UserCompetition.objects.filter(competition=competition)
 
-        if win_amount:
-            handle_quiz_end(
-                competition,
-                list(winners.values_list("user_profile__wallet_address", flat=True)),
-                win_amount,
-            )
-        else:
-            competition.tx_hash = "0x00"
-            competition.save()
+    winners = users_participated.filter(
+        correct_answer_count__gte=question_number,
+    )
 
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(  # type: ignore
-            f"quiz_{competition.pk}",
-            {"type": "finish_quiz", "data": {}},
-        )
+    winners_count = winners.count()
 
-        return -1
+    amount_win = competition.prize_amount
 
-    question = Question.objects.get(competition=competition, number=question_state)
+    if competition.split_prize:
+        win_amount = amount_win / winners_count if winners_count > 0 else 0
+    else:
+        win_amount = amount_win
 
-    data = QuestionSerializer(instance=question).data
+    winners.update(is_winner=True, amount_won=win_amount)
 
-    async_to_sync(channel_layer.group_send)(  # type: ignore
-        f"quiz_{competition.pk}",
-        {"type": "send_question", "data": json.dumps(data, cls=DjangoJSONEncoder)},
+    return (
+        list(winners.values_list("user_profile__wallet_address", flat=True)),
+        win_amount,
     )
 
-    time.sleep(ANSWER_TIME_SECOND)
 
-    def send_quiz_stats():
-        async_to_sync(channel_layer.group_send)(  # type: ignore
-            f"quiz_{competition.pk}",
-            {"type": "send_quiz_stats", "data": question_state + 1},
+def distribute_prize(
+    competition: Competition,
+    winners: list[str],
+    win_amount,
+    fencing_token: int | None = None,
+):
+    if fencing_token is not None and fencing_token != get_fencing_token(
+        round_driver_lease_key(competition.pk)
+    ):
+        raise StaleFencingToken(
+            f"Payout of competition {competition.pk} from a stale round driver."
         )
 
-    threading.Timer(1.0, send_quiz_stats).start()
-
-    return REST_BETWEEN_EACH_QUESTION_SECOND
+    if win_amount:
+        handle_quiz_end(competition, winners, win_amount)
+    else:
+        competition.tx_hash = "0x00"
+        competition.save()
 
 
 @shared_task(bind=True)
 def setup_competition_to_start(self, competition_pk):
-    channel_layer = get_channel_layer()
-
-    try:
-        competition: Competition = Competition.objects.get(pk=competition_pk)
-    except Competition.DoesNotExist:
-        logger.warning(f"Competition with pk {competition_pk} not exists.")
+    if settings.ROUND_SCHEDULER_BACKEND != "celery":
+        logger.warning(
+            f"Competition {competition_pk} is driven by the round scheduler service."
+        )
         return
 
-    state = "IDLE"
+    from quiz.scheduler import CompetitionRoundDriver
 
-    rest_still = (competition.start_at - timezone.now()).total_seconds() - 1
-    question_index = 1
-    logger.warning(
-        f"Resting {rest_still} seconds till the quiz begins and broadcast the questions."
-    )
-
-    while state != "FINISHED" or rest_still > 0:
-        time.sleep(rest_still)
-        rest_still = evaluate_state(competition, channel_layer, question_index)
-        question_index += 1
-        if rest_still == -1:
-            state = "FINISHED"
-            break
-
-    async_to_sync(channel_layer.group_send)(  # type: ignore
-        f"quiz_{competition.pk}",
-        {"type": "send_quiz_stats", "data": None},
-    )
+    async_to_sync(CompetitionRoundDriver(competition_pk).run)()
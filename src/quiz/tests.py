@@ -1,18 +1,97 @@
+import asyncio
+import json
+import math
+import random
+from unittest import mock
+import msgpack
 from typing import Any
-from django.test import TestCase
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from channels.layers import InMemoryChannelLayer, get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
 from django.utils import timezone
 from django.urls import reverse
 
 from authentication.models import UserProfile
 from quiz.models import Choice, Competition, Question, UserAnswer, UserCompetition
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
 from rest_framework.test import APITestCase
 from rest_framework.authtoken.models import Token
 
 from quiz.constants import ANSWER_TIME_SECOND, REST_BETWEEN_EACH_QUESTION_SECOND
+from quiz.clock import ANSWER, FINISHED, IDLE, REST, RoundClock, get_round_clock
+from quiz.eligibility import build_eligibility_index
+from core.metrics import get_counters, get_histogram
+from core.executor import InstrumentedThreadPoolExecutor
+from core.utils import (
+    dump_cache_value,
+    get_redis_client,
+    load_cache_value,
+    memcache_lock,
+    renew_lock,
+)
+from quiz.scheduler import (
+    CompetitionRoundDriver,
+    RoundScheduler,
+    broadcast_skew_name,
+)
+from quiz.checkpoints import (
+    CLAIMED,
+    RoundCheckpoint,
+    StaleFencingToken,
+    round_driver_lease_key,
+)
+from quiz.broadcast import broadcast, get_broadcast_hub
+from quiz.events import get_last_seq, get_missed_events
+from authentication.utils import get_user_from_token
+from witswin.routing import websocket_urlpatterns
+from witswin.server import LeveledPerMessageDeflate, accept_deflate
+from autobahn.websocket.compress import PerMessageDeflate, PerMessageDeflateOffer
+from quiz.tasks import distribute_prize
+from djangorestframework_camel_case.render import CamelCaseJSONRenderer
+from core.renderers import CamelCaseORJSONRenderer
+from quiz.serializers import (
+    CompetitionSerializer,
+    QuestionSerializer,
+    UserAnswerSerializer,
+    serialize_user_competition,
+)
+from quiz.answer_key import build_answer_key, get_answers_history, get_open_question
+from quiz.competition_list import (
+    build_competition_list,
+    flush_enrollment_counts,
+    get_competition_list,
+    render_competition_change,
+)
+from quiz.consumers import QuizConsumer, websocket_traffic
+from quiz import payloads as payloads_module
+from quiz.payloads import (
+    build_question_payloads,
+    get_cached_question_payload,
+    get_question_payloads_version,
+    load_question_payload,
+)
+from quiz.ingestion import (
+    AnswerRejected,
+    claim_answer,
+    enqueue_answer,
+    flush_answers,
+    ingest_answer,
+    validate_answer,
+)
 from quiz.utils import (
     get_previous_round_losses,
     get_quiz_question_state,
+    get_quiz_stats,
     get_round_participants,
     is_competition_finished,
     is_user_eligible_to_participate,
@@ -88,12 +167,42 @@ class BaseQuizTestUtils:
                 is_hinted_choice=bool(i in self.hint_choices),
             )
 
+        self.competition.refresh_from_db(fields=["question_count", "end_at"])
+
         return question
 
     def update_quiz_start_at(self, start_at):
         self.competition.start_at = start_at
         self.competition.save(update_fields=["start_at"])
 
+    def create_foreign_question(self):
+        """
+        A question with its choices in another competition.
+        """
+        competition = Competition.objects.create(
+            title="Other Competition",
+            start_at=self.competition.start_at,
+            user_profile=self.user_profile,
+            prize_amount=PRIZE_AMOUNT,
+            chain_id=10,
+            token_decimals=6,
+            token="USDC",
+            token_address="0x",
+            email_url="test@test.test",
+        )
+        question = Question.objects.create(
+            competition=competition, text="Foreign question", number=1
+        )
+
+        for i in range(4):
+            Choice.objects.create(
+                question=question,
+                is_correct=i == self.correct_choice_index,
+                text=f"Foreign Answer [{i}]",
+            )
+
+        return question
+
 
 class QuizRestfulTestCase(APITestCase, BaseQuizTestUtils):
     questions_list: list[Question] = []
@@ -111,6 +220,7 @@ class QuizRestfulTestCase(APITestCase, BaseQuizTestUtils):
         return reverse(f"{self.app_name}:{path}", args=args, kwargs=kwargs)
 
     def setUp(self):
+        cache.clear()
         self.app_name = "QUIZ"
         self.create_test_user()
         self.competition = Competition.objects.create(
@@ -241,6 +351,38 @@ class QuizRestfulTestCase(APITestCase, BaseQuizTestUtils):
             get_quiz_question_state(self.competition), 1, "We are in question 1"
         )
 
+    def test_answer_to_foreign_question_rejected(self):
+        self.update_quiz_start_at(timezone.now() - timezone.timedelta(seconds=1))
+        enrollment = self.enroll_user(self.user_profile, self.competition)
+        question = self.create_foreign_question()
+
+        res = self.client.post(
+            self.reverse_url("user-competition-answers"),
+            data={
+                "user_competition": enrollment.pk,
+                "question": question.pk,
+                "selected_choice": question.choices.order_by("id")[0].pk,
+            },
+            headers=self.get_authenticated_headers(),
+        )
+
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("question", res.json())
+
+        res = self.client.post(
+            self.reverse_url("user-competition-answers"),
+            data={
+                "user_competition": enrollment.pk,
+                "question": self.questions_list[0].pk,
+                "selected_choice": question.choices.order_by("id")[0].pk,
+            },
+            headers=self.get_authenticated_headers(),
+        )
+
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("selectedChoice", res.json())
+        self.assertFalse(UserAnswer.objects.filter(user_competition=enrollment).exists())
+
     def test_questions_seconds_state(self):
         self.update_quiz_start_at(
             timezone.now()
@@ -296,6 +438,7 @@ class QuizRestfulTestCase(APITestCase, BaseQuizTestUtils):
 class QuizUtilsTestCase(TestCase, BaseQuizTestUtils):
 
     def setUp(self):
+        cache.clear()
         self.app_name = "QUIZ"
         self.create_test_user()
         self.competition = Competition.objects.create(
@@ -641,6 +784,1326 @@ class QuizUtilsTestCase(TestCase, BaseQuizTestUtils):
         self.assertEqual(participants, 0, "All answered wrong")
         self.assertEqual(losers, 1, "One player lost at last question")
 
+    def test_eligibility_index_without_queries(self):
+        user1 = self.create_user_profile("ali", "0xFD")
+        user2 = self.create_user_profile("mamad", "0x862")
+
+        user_enroll1 = self.enroll_user(user1, self.competition)
+        user_enroll2 = self.enroll_user(user2, self.competition)
+
+        self.update_quiz_start_at(
+            timezone.now()
+            - timezone.timedelta(
+                seconds=ANSWER_TIME_SECOND + REST_BETWEEN_EACH_QUESTION_SECOND + 1
+            )
+        )
+
+        build_eligibility_index(self.competition)
+
+        question: Any = self.competition.questions.order_by("number").first()
+
+        self.create_answer(user_enroll1, question, CORRECT_CHOICE_INDEX)
+        self.create_answer(user_enroll2, question, 0)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                is_user_eligible_to_participate(user1, self.competition),
+                "Answers update the index as they are stored",
+            )
+            self.assertFalse(
+                is_user_eligible_to_participate(user2, self.competition),
+                "Wrong answer eliminates the user",
+            )
+
+        cache.clear()
+        build_eligibility_index(self.competition)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(is_user_eligible_to_participate(user1, self.competition))
+            self.assertFalse(is_user_eligible_to_participate(user2, self.competition))
+
+
+    def test_write_behind_answers_flush(self):
+        user1 = self.create_user_profile("ali", "0xFD")
+        user2 = self.create_user_profile("mamad", "0x862")
+
+        user_enroll1 = self.enroll_user(user1, self.competition)
+        user_enroll2 = self.enroll_user(user2, self.competition)
+
+        self.update_quiz_start_at(timezone.now() - timezone.timedelta(seconds=1))
+
+        question, next_question = self.competition.questions.order_by("number")[:2]
+        choices = list(question.choices.order_by("id"))
+
+        for user_enroll, choice in [
+            (user_enroll1, choices[CORRECT_CHOICE_INDEX]),
+            (user_enroll2, choices[0]),
+        ]:
+            res = ingest_answer(self.competition, user_enroll, question.pk, choice.pk)
+            self.assertEqual(res["is_correct"], choice.is_correct)
+            self.assertEqual(res["correct_choice"], choices[CORRECT_CHOICE_INDEX].pk)
+            async_to_sync(enqueue_answer)(user_enroll, question.pk, choice.pk)
+
+        with self.assertRaises(AnswerRejected, msg="Choice of another question"):
+            ingest_answer(
+                self.competition,
+                user_enroll1,
+                question.pk,
+                next_question.choices.first().pk,
+            )
+
+        with self.assertRaises(AnswerRejected, msg="Question is not shown yet"):
+            ingest_answer(
+                self.competition,
+                user_enroll1,
+                next_question.pk,
+                next_question.choices.first().pk,
+            )
+
+        self.assertFalse(
+            is_user_eligible_to_participate(user2, self.competition),
+            "Index is updated before the answers are stored",
+        )
+        self.assertEqual(UserAnswer.objects.filter(question=question).count(), 0)
+
+        self.assertEqual(flush_answers(self.competition.pk, batch_size=1), 2)
+        self.assertEqual(UserAnswer.objects.filter(question=question).count(), 2)
+        self.assertEqual(flush_answers(self.competition.pk), 0, "Queue is drained")
+
+        user_enroll1.refresh_from_db()
+        user_enroll2.refresh_from_db()
+
+        self.assertEqual(user_enroll1.correct_answer_count, 1)
+        self.assertEqual(user_enroll1.last_answered_number, 1)
+        self.assertIsNone(user_enroll1.eliminated_at_question)
+        self.assertEqual(user_enroll2.correct_answer_count, 0)
+        self.assertEqual(user_enroll2.eliminated_at_question, 1)
+
+        async_to_sync(enqueue_answer)(
+            user_enroll1, question.pk, choices[CORRECT_CHOICE_INDEX].pk
+        )
+        flush_answers(self.competition.pk)
+        user_enroll1.refresh_from_db()
+
+        self.assertEqual(
+            user_enroll1.correct_answer_count, 1, "Duplicates are not counted twice"
+        )
+
+    def test_question_count_and_end_at_stored(self):
+        round_seconds = ANSWER_TIME_SECOND + REST_BETWEEN_EACH_QUESTION_SECOND
+
+        self.update_quiz_start_at(timezone.now() - timezone.timedelta(seconds=1))
+
+        self.assertEqual(self.competition.question_count, 8)
+        self.assertEqual(
+            self.competition.end_at,
+            self.competition.start_at + timezone.timedelta(seconds=8 * round_seconds),
+        )
+
+        with self.assertNumQueries(0):
+            self.assertTrue(self.competition.is_in_progress)
+            self.assertFalse(self.competition.is_finished)
+            self.assertFalse(is_competition_finished(self.competition))
+
+        self.assertQuerySetEqual(
+            Competition.objects.in_progress, [self.competition]
+        )
+        self.assertQuerySetEqual(Competition.objects.finished, [])
+
+        question = self.create_sample_question(9)
+        self.assertEqual(self.competition.question_count, 9)
+        self.assertEqual(
+            self.competition.end_at,
+            self.competition.start_at + timezone.timedelta(seconds=9 * round_seconds),
+        )
+
+        question.delete()
+        self.competition.refresh_from_db()
+        self.assertEqual(self.competition.question_count, 8)
+
+        self.update_quiz_start_at(
+            timezone.now() - timezone.timedelta(seconds=8 * round_seconds + 1)
+        )
+
+        self.assertTrue(self.competition.is_finished)
+        self.assertQuerySetEqual(Competition.objects.in_progress, [])
+        self.assertQuerySetEqual(Competition.objects.finished, [self.competition])
+
+    def test_answers_and_hints_validated_by_answer_key(self):
+        self.update_quiz_start_at(timezone.now() - timezone.timedelta(seconds=1))
+
+        question, next_question = self.competition.questions.order_by("number")[:2]
+        choices = list(question.choices.order_by("id"))
+        other_choice = next_question.choices.first()
+
+        build_eligibility_index(self.competition)
+        answer_key = build_answer_key(self.competition)
+
+        self.assertEqual(
+            answer_key[question.pk]["hinted_choices"],
+            [choices[index].pk for index in HINT_CHOICES],
+        )
+        self.assertEqual(
+            answer_key[next_question.pk]["deadline"],
+            (
+                self.competition.start_at
+                + timezone.timedelta(
+                    seconds=2 * ANSWER_TIME_SECOND + REST_BETWEEN_EACH_QUESTION_SECOND - 2
+                )
+            ).timestamp(),
+            "Answers close when the correct choice is revealed",
+        )
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                validate_answer(self.competition, question.pk, choices[0].pk),
+                (answer_key[question.pk], False),
+            )
+            self.assertEqual(
+                validate_answer(
+                    self.competition, question.pk, choices[CORRECT_CHOICE_INDEX].pk
+                ),
+                (answer_key[question.pk], True),
+            )
+
+            with self.assertRaises(AnswerRejected, msg="Choice of another question"):
+                validate_answer(self.competition, question.pk, other_choice.pk)
+
+        self.update_quiz_start_at(
+            timezone.now() - timezone.timedelta(seconds=ANSWER_TIME_SECOND - 1)
+        )
+
+        self.assertTrue(question.answer_can_be_shown)
+
+        with self.assertRaises(AnswerRejected, msg="Correct choice is revealed"):
+            get_open_question(self.competition, question.pk)
+
+
+    def test_answer_progress_recorded_from_answer_key(self):
+        enrollment = self.enroll_user(self.user_profile, self.competition)
+        question = self.questions_list[0]
+        choice = question.choices.order_by("id")[CORRECT_CHOICE_INDEX]
+
+        build_answer_key(self.competition)
+
+        with self.assertNumQueries(2):
+            UserAnswer.objects.create(
+                user_competition=enrollment,
+                question_id=question.pk,
+                selected_choice_id=choice.pk,
+            )
+
+        enrollment.refresh_from_db()
+        self.assertEqual(enrollment.correct_answer_count, 1)
+        self.assertEqual(enrollment.last_answered_number, question.number)
+
+    def test_answer_progress_with_question_outside_answer_key(self):
+        enrollment = self.enroll_user(self.user_profile, self.competition)
+        question = self.questions_list[0]
+        choice = question.choices.order_by("id")[CORRECT_CHOICE_INDEX]
+
+        # a key read before the question was added
+        build_answer_key(self.competition).pop(question.pk)
+
+        UserAnswer.objects.create(
+            user_competition=enrollment,
+            question_id=question.pk,
+            selected_choice_id=choice.pk,
+        )
+
+        enrollment.refresh_from_db()
+        self.assertEqual(enrollment.correct_answer_count, 1)
+
+        foreign_question = self.create_foreign_question()
+
+        UserAnswer.objects.create(
+            user_competition=enrollment,
+            question=foreign_question,
+            selected_choice=foreign_question.choices.order_by("id")[
+                CORRECT_CHOICE_INDEX
+            ],
+        )
+
+        enrollment.refresh_from_db()
+        self.assertEqual(enrollment.correct_answer_count, 1)
+        self.assertEqual(enrollment.last_answered_number, question.number)
+
+    def test_quiz_stats_calculated_once_per_round(self):
+        users = [
+            self.create_user_profile("ali", "0xFD"),
+            self.create_user_profile("mamad", "0x862"),
+        ]
+        user_enrolls = [self.enroll_user(user, self.competition) for user in users]
+
+        self.update_quiz_start_at(
+            timezone.now()
+            - timezone.timedelta(
+                seconds=ANSWER_TIME_SECOND + REST_BETWEEN_EACH_QUESTION_SECOND + 1
+            )
+        )
+
+        question: Any = self.competition.questions.order_by("number").first()
+        self.create_answer(user_enrolls[0], question, CORRECT_CHOICE_INDEX)
+
+        stats = get_quiz_stats(self.competition, refresh=True)
+
+        self.assertEqual(stats["users_participating"], 1)
+        self.assertEqual(stats["previous_round_losses"], 1)
+        self.assertEqual(stats["total_participants_count"], 2)
+        self.assertEqual(stats["questions_count"], len(self.questions_list))
+        self.assertEqual(stats["prize_to_win"], PRIZE_AMOUNT)
+        self.assertNotIn("hint_count", stats, "Hint count is added per user")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_quiz_stats(self.competition), stats)
+
+
+    def test_question_payloads_prerendered(self):
+        self.update_quiz_start_at(timezone.now() + timezone.timedelta(seconds=10))
+        self.enroll_user(self.create_user_profile("ali", "0xFD"), self.competition)
+
+        with self.assertNumQueries(3):
+            build_question_payloads(self.competition)
+
+        with self.assertNumQueries(0):
+            not_eligible, eligible = get_cached_question_payload(
+                self.competition.pk, 1
+            )
+
+        data = json.loads(eligible)
+
+        self.assertEqual(data["type"], "new_question")
+        self.assertTrue(data["question"]["isEligible"])
+        self.assertFalse(json.loads(not_eligible)["question"]["isEligible"])
+        self.assertEqual(data["question"]["number"], 1)
+        self.assertEqual(data["question"]["totalParticipantsCount"], 1)
+        self.assertEqual(data["question"]["remainParticipantsCount"], 0)
+        self.assertEqual(data["question"]["amountWonPerUser"], PRIZE_AMOUNT)
+        self.assertEqual(len(data["question"]["choices"]), 4)
+        self.assertTrue(
+            all(choice["isCorrect"] is None for choice in data["question"]["choices"]),
+            "Correct choice is hidden while the question is broadcast",
+        )
+
+    def test_question_payloads_follow_the_version(self):
+        build_question_payloads(self.competition)
+
+        payloads_module._question_payloads[(self.competition.pk, 1)] = (
+            get_question_payloads_version(self.competition.pk) - 1,
+            0,
+            ("stale", "stale"),
+        )
+
+        self.assertIsNone(
+            get_cached_question_payload(self.competition.pk, 1),
+            "The version of the local copy is due to be checked",
+        )
+
+        with self.assertNumQueries(0):
+            not_eligible, _ = load_question_payload(self.competition.pk, 1)
+
+        self.assertEqual(json.loads(not_eligible)["question"]["number"], 1)
+
+        question = self.questions_list[0]
+        question.text = "Updated on another node"
+        question.save()
+
+        with self.assertNumQueries(4):
+            _, eligible = load_question_payload(self.competition.pk, 1)
+
+        self.assertEqual(
+            json.loads(eligible)["question"]["text"], "Updated on another node"
+        )
+
+        self.questions_list[2].delete()
+
+        with self.assertNumQueries(4):
+            self.assertIsNone(load_question_payload(self.competition.pk, 3))
+
+        with self.assertNumQueries(0):
+            self.assertIsNone(
+                load_question_payload(self.competition.pk, 3),
+                "Missing questions don't render the payloads again",
+            )
+
+
+    def test_answers_history_single_query(self):
+        enrollment = self.enroll_user(self.user_profile, self.competition)
+        questions = list(self.competition.questions.order_by("number"))
+
+        self.update_quiz_start_at(
+            timezone.now()
+            - timezone.timedelta(
+                seconds=3 * (ANSWER_TIME_SECOND + REST_BETWEEN_EACH_QUESTION_SECOND)
+                + 5
+            )
+        )
+
+        self.create_answer(enrollment, questions[0], CORRECT_CHOICE_INDEX)
+        self.create_answer(enrollment, questions[2], 0)
+        self.create_answer(enrollment, questions[3], CORRECT_CHOICE_INDEX)
+
+        build_eligibility_index(self.competition)
+        build_answer_key(self.competition)
+
+        user_competition_data = serialize_user_competition(
+            UserCompetition.objects.get(pk=enrollment.pk)
+        )
+
+        with self.assertNumQueries(1):
+            history = get_answers_history(
+                self.competition, enrollment, user_competition_data
+            )
+
+        self.assertEqual(
+            [answer["question"] for answer in history],
+            [question.pk for question in questions[:4]],
+        )
+        self.assertEqual(
+            [answer["selected_choice"]["is_correct"] for answer in history],
+            [True, False, False, None],
+            "Missed question is wrong, the current answer is hidden",
+        )
+        self.assertEqual(history[1]["id"], -1)
+        self.assertIsNone(history[1]["selected_choice"]["id"])
+        self.assertEqual(
+            history[0]["user_competition"],
+            UserAnswerSerializer(UserAnswer.objects.first()).data["user_competition"],
+            "Same shape as the serialized answers",
+        )
+        self.assertEqual(
+            history[1]["user_competition"]["competition"]["id"], self.competition.pk
+        )
+
+    def test_cache_value_format_matches_redis_cache(self):
+        key = cache.make_and_validate_key("cache_value_format")
+
+        for value in ["node-a", 7, -3, 2**70, True, 1.5, {"ids": [1, 2]}]:
+            cache.set("cache_value_format", value)
+            stored = get_redis_client().get(key)
+            dumped = dump_cache_value(value)
+
+            self.assertEqual(load_cache_value(stored), value)
+            self.assertEqual(
+                dumped if isinstance(dumped, bytes) else str(dumped).encode(), stored
+            )
+
+    def test_orjson_renderer_matches_camel_case_renderer(self):
+        self.enroll_user(self.create_user_profile("ali", "0xFD"), self.competition)
+
+        payloads = [
+            CompetitionSerializer(Competition.objects.all(), many=True).data,
+            {
+                "type": "new_question",
+                "question": QuestionSerializer(self.questions_list[0]).data,
+            },
+        ]
+
+        for payload in payloads:
+            expected = json.loads(CamelCaseJSONRenderer().render(payload))
+
+            self.assertEqual(
+                json.loads(CamelCaseORJSONRenderer().render(payload)), expected
+            )
+
+            # PyPy, where orjson can't be installed
+            with mock.patch("core.renderers.orjson", None):
+                self.assertEqual(
+                    json.loads(CamelCaseORJSONRenderer().render(payload)), expected
+                )
+
+    def test_competition_list_snapshot(self):
+        self.enroll_user(self.create_user_profile("ali", "0xFD"), self.competition)
+
+        with self.assertNumQueries(3):
+            snapshot, _ = build_competition_list()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_competition_list(), snapshot)
+
+        data = json.loads(snapshot["text"])
+
+        self.assertEqual(data["type"], "competition_list")
+        self.assertEqual(data["version"], snapshot["version"])
+        self.assertEqual(data["data"][0]["participantsCount"], 1)
+        self.assertEqual(len(data["data"][0]["questions"]), 8)
+
+        self.competition.is_active = False
+        self.competition.save()
+
+        self.assertEqual(json.loads(get_competition_list()["text"])["data"], [])
+
+        change = json.loads(render_competition_change(self.competition))
+
+        self.assertEqual(change["type"], "remove_competition")
+        self.assertEqual(change["data"], self.competition.pk)
+        self.assertGreater(change["version"], snapshot["version"])
+        self.assertEqual(get_competition_list()["version"], change["version"])
+
+
+    def test_enrollment_counts_coalesced(self):
+        other = self.create_user_profile("ali", "0xFD")
+        self.enroll_user(other, self.competition)
+        self.enroll_user(self.create_user_profile("reza", "0xFE"), self.competition)
+
+        channel_layer = get_channel_layer()
+        channel = async_to_sync(channel_layer.new_channel)()  # type: ignore
+        async_to_sync(channel_layer.group_add)("quiz_list", channel)  # type: ignore
+
+        self.assertEqual(
+            flush_enrollment_counts(),
+            [{"id": self.competition.pk, "participants_count": 2}],
+        )
+        self.assertEqual(flush_enrollment_counts(), [], "Deltas are flushed once")
+
+        event = async_to_sync(channel_layer.receive)(channel)  # type: ignore
+
+        self.assertEqual(
+            json.loads(event["text"])["data"],
+            [{"id": self.competition.pk, "participantsCount": 2}],
+        )
+
+        UserCompetition.objects.filter(user_profile=other).delete()
+        self.enroll_user(other, self.competition)
+
+        self.assertEqual(flush_enrollment_counts(), [], "Nothing changed")
+
+
+ROUND_SECONDS = ANSWER_TIME_SECOND + REST_BETWEEN_EACH_QUESTION_SECOND
+
+
+# the time math the clock replaced, kept to check the clock against it
+def legacy_question_state(start_at, question_count, now):
+    if start_at > now:
+        return 0
+
+    return min(math.floor((now - start_at).seconds / ROUND_SECONDS) + 1, question_count)
+
+
+def legacy_is_in_progress(start_at, question_count, now):
+    return start_at <= now and (
+        start_at
+        + timezone.timedelta(
+            seconds=question_count * ROUND_SECONDS - REST_BETWEEN_EACH_QUESTION_SECOND
+        )
+        >= now
+    )
+
+
+def legacy_is_finished(start_at, question_count, now):
+    end_at = start_at + timezone.timedelta(seconds=question_count * ROUND_SECONDS)
+
+    return not legacy_is_in_progress(start_at, question_count, now) and end_at <= now
+
+
+def legacy_question_shown(start_at, question_number, now):
+    return (
+        start_at + timezone.timedelta(seconds=(question_number - 1) * ROUND_SECONDS)
+        <= now
+    )
+
+
+def legacy_answer_revealed(start_at, question_number, now):
+    seconds = (question_number - 1) * ROUND_SECONDS + ANSWER_TIME_SECOND - 2
+
+    return start_at + timezone.timedelta(seconds=seconds) <= now
+
+
+class RoundClockTestCase(SimpleTestCase):
+    def random_instants(self, seed: int, count: int = 2000):
+        rand = random.Random(seed)
+        start_at = timezone.now().replace(microsecond=0)
+
+        for _ in range(count):
+            question_count = rand.randint(1, 30)
+            offset = rand.uniform(-60, question_count * ROUND_SECONDS + 60)
+            # land exactly on the round boundaries every now and then
+            if rand.random() < 0.2:
+                offset = round(offset / ROUND_SECONDS) * ROUND_SECONDS
+
+            now = start_at + timezone.timedelta(seconds=offset)
+
+            yield RoundClock(start_at, question_count), now
+
+    def test_matches_legacy_time_math(self):
+        for clock, now in self.random_instants(seed=25):
+            start_at, count = clock.start_at, clock.question_count
+            context = f"{count} questions, {clock.elapsed(now)}s elapsed"
+
+            self.assertEqual(
+                clock.round_at(now), legacy_question_state(start_at, count, now), context
+            )
+            self.assertEqual(
+                clock.is_in_progress(now),
+                legacy_is_in_progress(start_at, count, now),
+                context,
+            )
+            self.assertEqual(
+                clock.is_finished(now), legacy_is_finished(start_at, count, now), context
+            )
+
+            for number in range(1, count + 1):
+                self.assertEqual(
+                    clock.is_question_shown(number, now),
+                    legacy_question_shown(start_at, number, now),
+                    context,
+                )
+                self.assertEqual(
+                    clock.is_answer_revealed(number, now),
+                    legacy_answer_revealed(start_at, number, now),
+                    context,
+                )
+
+    def test_phase_and_next_deadline(self):
+        for clock, now in self.random_instants(seed=2025):
+            phase = clock.phase_at(now)
+            deadline = clock.next_deadline(now)
+
+            if phase == FINISHED:
+                self.assertIsNone(deadline)
+                self.assertTrue(clock.is_finished(now))
+                continue
+
+            self.assertGreater(deadline, now)
+
+            if phase == IDLE:
+                self.assertEqual(deadline, clock.start_at)
+                continue
+
+            phase_seconds = (
+                ANSWER_TIME_SECOND if phase == ANSWER else REST_BETWEEN_EACH_QUESTION_SECOND
+            )
+            self.assertLessEqual(clock.time_to_next_deadline(now), phase_seconds)
+
+            number = clock.round_at(now)
+            self.assertEqual(
+                phase,
+                ANSWER if now < clock.answer_deadline(number) else REST,
+            )
+            self.assertNotEqual(clock.phase_at(deadline), phase)
+
+    def test_stays_finished_after_a_day(self):
+        start_at = timezone.now() - timezone.timedelta(days=1, seconds=5)
+        clock = RoundClock(start_at, 10)
+        now = timezone.now()
+
+        # ``timedelta.seconds`` wraps every day, the old math restarted the quiz
+        self.assertEqual(legacy_question_state(start_at, 10, now), 1)
+        self.assertEqual(clock.round_at(now), 10)
+        self.assertEqual(clock.completed_rounds(now), 10)
+        self.assertEqual(clock.phase_at(now), FINISHED)
+        self.assertTrue(clock.is_finished(now))
+
+    def test_clock_is_cached_per_schedule(self):
+        start_at = timezone.now()
+
+        self.assertIs(get_round_clock(start_at, 5), get_round_clock(start_at, 5))
+        self.assertIsNot(get_round_clock(start_at, 5), get_round_clock(start_at, 6))
+        self.assertEqual(
+            Competition(start_at=start_at, question_count=5).clock,
+            RoundClock(start_at, 5),
+        )
+
+
+class CompetitionRoundDriverTestCase(TransactionTestCase, BaseQuizTestUtils):
+
+    def setUp(self):
+        cache.clear()
+        self.create_test_user()
+        self.competition = Competition.objects.create(
+            title="Test Competition",
+            start_at=timezone.now() + timezone.timedelta(seconds=0.3),
+            user_profile=self.user_profile,
+            prize_amount=PRIZE_AMOUNT,
+            chain_id=10,
+            token_decimals=6,
+            token="USDC",
+            token_address="0x",
+            email_url="test@test.test",
+        )
+
+        self.questions_list = [
+            self.create_sample_question(1),
+            self.create_sample_question(2),
+        ]
+
+    def create_driver(self, channel_layer=None, answer_seconds=0.2):
+        return CompetitionRoundDriver(
+            self.competition.pk,
+            channel_layer,
+            answer_seconds=answer_seconds,
+            rest_seconds=0.1,
+            stats_delay_seconds=0.05,
+        )
+
+    async def connect(self, user=None, query="", drain=True):
+        """
+        Opens a quiz socket of the competition, the messages sent at connect
+        are dropped unless ``drain`` is False.
+        """
+        communicator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns),
+            f"/ws/quiz/{self.competition.pk}/{query}",
+        )
+        communicator.scope["user"] = user or AnonymousUser()
+
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        if drain:
+            await self.receive_messages(communicator)
+
+        return communicator
+
+    async def receive_messages(self, communicator, timeout=0.1):
+        messages = []
+
+        while not await communicator.receive_nothing(timeout):
+            messages.append(await communicator.receive_json_from())
+
+        return messages
+
+    async def receive_events(self, channel_layer, channel):
+        events = []
+
+        while True:
+            try:
+                events.append(
+                    await asyncio.wait_for(channel_layer.receive(channel), 0.1)
+                )
+            except asyncio.TimeoutError:
+                return events
+
+    async def test_rounds_broadcast(self):
+        channel_layer = InMemoryChannelLayer()
+        channel = await channel_layer.new_channel()
+        await channel_layer.group_add(f"quiz_{self.competition.pk}", channel)
+
+        driver = self.create_driver(channel_layer)
+
+        await driver.run()
+
+        events = await self.receive_events(channel_layer, channel)
+
+        self.assertEqual(
+            [event["type"] for event in events],
+            [
+                "send_question",
+                "send_quiz_stats",
+                "send_question",
+                "send_quiz_stats",
+                "finish_quiz",
+                "send_quiz_stats",
+            ],
+        )
+        self.assertEqual(events[0]["data"], 1)
+        self.assertEqual(events[2]["data"], 2)
+        self.assertEqual(events[1]["data"]["questions_count"], 2)
+
+        for event in events:
+            self.assertGreater(event["sent_at"] - event["intended_at"], -0.01)
+
+        self.assertEqual(
+            events[0]["intended_at"], self.competition.start_at.timestamp()
+        )
+
+        skew = await sync_to_async(get_histogram)(
+            broadcast_skew_name(self.competition.pk, 1)
+        )
+        self.assertEqual(skew["count"], 2, "Question and stats of round 1")
+
+        skew = await sync_to_async(get_histogram)(
+            broadcast_skew_name(self.competition.pk)
+        )
+        self.assertEqual(skew["count"], len(events))
+
+        await self.competition.arefresh_from_db()
+        self.assertEqual(self.competition.tx_hash, "0x00", "Nobody won")
+
+
+    @override_settings(QUIZ_EVENT_STREAM_LENGTH=4)
+    async def test_missed_events_resumed_from_stream(self):
+        channel_layer = InMemoryChannelLayer()
+        channel = await channel_layer.new_channel()
+        await channel_layer.group_add(f"quiz_{self.competition.pk}", channel)
+
+        await self.create_driver(channel_layer).run()
+
+        events = await self.receive_events(channel_layer, channel)
+
+        self.assertEqual([event["seq"] for event in events], [1, 2, 3, 4, 5, 6])
+        self.assertEqual(await get_last_seq(self.competition.pk), 6)
+
+        self.assertEqual(await get_missed_events(self.competition.pk, 3), events[3:])
+        self.assertEqual(await get_missed_events(self.competition.pk, 6), [])
+        self.assertIsNone(
+            await get_missed_events(self.competition.pk, 1),
+            "The second event is not retained, the full state is sent instead",
+        )
+
+    async def test_invalid_resume_sends_current_state(self):
+        user = await sync_to_async(get_user_from_token)(self.token)
+        communicator = await self.connect(user, "?seq=x", drain=False)
+
+        state = await self.receive_messages(communicator)
+        self.assertEqual(state[0]["type"], "event_seq")
+
+        await communicator.send_json_to({"command": "RESUME", "args": {"seq": None}})
+
+        state = await self.receive_messages(communicator)
+        self.assertEqual(state[0]["type"], "event_seq")
+
+        await communicator.send_json_to({"command": "TIME_SYNC", "args": {}})
+
+        self.assertEqual(
+            (await communicator.receive_json_from())["type"],
+            "time_sync",
+            "The socket is still open",
+        )
+
+        await communicator.disconnect()
+
+    async def test_competition_driven_by_lease_holder_only(self):
+        channel_layer = InMemoryChannelLayer()
+        channel = await channel_layer.new_channel()
+        await channel_layer.group_add(f"quiz_{self.competition.pk}", channel)
+
+        leader = self.create_driver(channel_layer)
+        leading = asyncio.create_task(leader.run())
+        await channel_layer.receive(channel)
+
+        follower = self.create_driver(channel_layer)
+        await follower.run()
+
+        self.assertIsNone(follower.fencing_token, "The lease is already held")
+
+        await leading
+        events = await self.receive_events(channel_layer, channel)
+
+        self.assertEqual(
+            [event["type"] for event in events].count("send_question"),
+            1,
+            "Only the second question is left",
+        )
+        self.assertTrue(all(event["fence"] == leader.fencing_token for event in events))
+
+        next_leader = self.create_driver(channel_layer)
+        await next_leader.run()
+
+        self.assertGreater(next_leader.fencing_token, leader.fencing_token)
+
+        with self.assertRaises(StaleFencingToken):
+            await sync_to_async(distribute_prize)(
+                self.competition, [], 0, leader.fencing_token
+            )
+
+    async def test_lease_renewed_by_its_owner_only(self):
+        lease_key = round_driver_lease_key(self.competition.pk)
+
+        with memcache_lock(lease_key, "node-a", 5) as acquired:
+            self.assertTrue(acquired)
+            self.assertTrue(await sync_to_async(renew_lock)(lease_key, "node-a", 5))
+            self.assertFalse(await sync_to_async(renew_lock)(lease_key, "node-b", 5))
+
+            await sync_to_async(cache.set)(lease_key, "node-b", 5)
+
+            self.assertFalse(
+                await sync_to_async(renew_lock)(lease_key, "node-a", 5),
+                "The lease expired and was taken by another node",
+            )
+
+        driver = self.create_driver(InMemoryChannelLayer())
+
+        with (
+            self.settings(ROUND_DRIVER_LEASE_SECONDS=0.3),
+            mock.patch("quiz.scheduler.renew_lock", side_effect=ConnectionError),
+            self.assertLogs("quiz.scheduler", "ERROR"),
+        ):
+            await driver.run()
+
+        self.assertTrue(driver.lease_lost, "Failing renewals stop the driver")
+
+    async def test_stale_driver_events_dropped(self):
+        user = await sync_to_async(get_user_from_token)(self.token)
+        communicator = await self.connect(user)
+
+        for fence, round_number in [(2, 1), (1, 2), (2, 3)]:
+            await broadcast(
+                get_channel_layer(),
+                f"quiz_{self.competition.pk}",
+                {
+                    "type": "send_quiz_stats",
+                    "data": {"round": round_number},
+                    "fence": fence,
+                },
+            )
+
+        replies = await self.receive_messages(communicator, 0.2)
+
+        await communicator.disconnect()
+
+        self.assertEqual(
+            [reply["data"]["round"] for reply in replies],
+            [1, 3],
+            "The event of the driver with the lower fencing token is dropped",
+        )
+
+    @override_settings(QUIZ_BROADCAST_MODE="hub")
+    async def test_rounds_broadcast_through_hub(self):
+        class Consumer:
+            def __init__(self):
+                self.events = []
+
+            async def dispatch(self, event):
+                self.events.append(event)
+
+        group_name = f"quiz_{self.competition.pk}"
+        hub = get_broadcast_hub()
+        consumers = [Consumer(), Consumer()]
+
+        for consumer in consumers:
+            await hub.join(group_name, consumer)
+
+        await self.create_driver().run()
+        await asyncio.sleep(0.1)
+
+        await hub.leave(group_name, consumers[1])
+        await hub.close()
+
+        types = [event["type"] for event in consumers[0].events]
+
+        self.assertEqual(types[:2], ["send_question", "send_quiz_stats"])
+        self.assertEqual(types[-2:], ["finish_quiz", "send_quiz_stats"])
+        self.assertEqual(consumers[0].events, consumers[1].events)
+
+    async def test_consumer_forwards_round_events(self):
+        enrollment = await sync_to_async(self.enroll_user)(
+            self.user_profile, self.competition
+        )
+        user = await sync_to_async(get_user_from_token)(self.token)
+        communicator = await self.connect(user, drain=False)
+
+        state = [await communicator.receive_json_from() for _ in range(5)]
+
+        self.assertEqual(
+            [message["type"] for message in state],
+            ["event_seq", "time_sync", "answers_history", "quiz_stats", "idle"],
+        )
+        self.assertEqual(state[3]["data"]["hintCount"], enrollment.hint_count)
+
+        await self.create_driver(get_channel_layer()).run()
+
+        messages = await self.receive_messages(communicator)
+
+        await communicator.disconnect()
+
+        self.assertEqual(
+            [message["type"] for message in messages],
+            [
+                "new_question",
+                "quiz_stats",
+                "new_question",
+                "quiz_stats",
+                "quiz_finish",
+                "quiz_stats",
+            ],
+        )
+        self.assertEqual([message["seq"] for message in messages], [1, 2, 3, 4, 5, 6])
+        self.assertTrue(messages[0]["question"]["isEligible"])
+        self.assertEqual(messages[4]["winnersList"], [])
+
+    async def test_consumer_msgpack_subprotocol(self):
+        communicator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns),
+            f"/ws/quiz/{self.competition.pk}/",
+            subprotocols=["msgpack"],
+        )
+        communicator.scope["user"] = AnonymousUser()
+
+        connected, subprotocol = await communicator.connect()
+
+        self.assertTrue(connected)
+        self.assertEqual(subprotocol, "msgpack")
+
+        state = [
+            msgpack.unpackb((await communicator.receive_output())["bytes"])
+            for _ in range(5)
+        ]
+        self.assertEqual(
+            [message["type"] for message in state],
+            ["event_seq", "time_sync", "answers_history", "quiz_stats", "idle"],
+        )
+
+        await communicator.send_to(bytes_data=msgpack.packb({"command": "PING"}))
+        pong = await communicator.receive_output()
+
+        self.assertEqual(msgpack.unpackb(pong["bytes"]), "PONG")
+
+        await self.create_driver(get_channel_layer()).run()
+
+        messages = []
+
+        while not await communicator.receive_nothing(0.1):
+            messages.append(
+                msgpack.unpackb((await communicator.receive_output())["bytes"])
+            )
+
+        await communicator.disconnect()
+
+        self.assertEqual([message["seq"] for message in messages], [1, 2, 3, 4, 5, 6])
+        self.assertEqual(messages[0]["type"], "new_question")
+        self.assertFalse(messages[0]["question"]["isEligible"])
+        self.assertEqual(messages[1]["data"]["questionsCount"], 2)
+
+    async def test_duplicate_and_early_answers_dropped(self):
+        enrollment = await sync_to_async(self.enroll_user)(
+            self.user_profile, self.competition
+        )
+        await sync_to_async(self.update_quiz_start_at)(
+            timezone.now() - timezone.timedelta(seconds=1)
+        )
+        user = await sync_to_async(get_user_from_token)(self.token)
+        question, next_question = self.questions_list
+        choice = await question.choices.order_by("id").afirst()
+        next_choice = await next_question.choices.order_by("id").afirst()
+
+        communicator = await self.connect(user)
+
+        for _ in range(3):
+            await communicator.send_json_to(
+                {
+                    "command": "ANSWER",
+                    "args": {"questionId": question.pk, "selectedChoiceId": choice.pk},
+                }
+            )
+
+        await communicator.send_json_to(
+            {
+                "command": "ANSWER",
+                "args": {
+                    "questionId": next_question.pk,
+                    "selectedChoiceId": next_choice.pk,
+                },
+            }
+        )
+
+        replies = await self.receive_messages(communicator, 0.2)
+
+        await communicator.disconnect()
+
+        self.assertEqual([reply["type"] for reply in replies], ["add_answer"])
+        self.assertEqual(replies[0]["data"]["questionId"], question.pk)
+        self.assertEqual(
+            replies[0]["data"]["answer"]["userCompetition"]["id"], enrollment.pk
+        )
+        self.assertEqual(
+            replies[0]["data"]["answer"]["userCompetition"]["competition"]["id"],
+            self.competition.pk,
+        )
+        self.assertEqual(
+            await UserAnswer.objects.filter(user_competition=enrollment).acount(), 1
+        )
+        self.assertTrue(
+            await claim_answer(enrollment, next_question.pk),
+            "Rejected answers release their claim",
+        )
+
+    async def test_failed_answer_releases_its_claim(self):
+        enrollment = await sync_to_async(self.enroll_user)(
+            self.user_profile, self.competition
+        )
+        await sync_to_async(self.update_quiz_start_at)(
+            timezone.now() - timezone.timedelta(seconds=1)
+        )
+        user = await sync_to_async(get_user_from_token)(self.token)
+        question = self.questions_list[0]
+        choice = await question.choices.order_by("id").afirst()
+        command = {
+            "command": "ANSWER",
+            "args": {"questionId": question.pk, "selectedChoiceId": choice.pk},
+        }
+
+        communicator = await self.connect(user)
+
+        with mock.patch.object(
+            QuizConsumer, "save_answer", side_effect=DatabaseError("connection lost")
+        ):
+            await communicator.send_json_to(command)
+            self.assertEqual(await self.receive_messages(communicator), [])
+
+        await communicator.send_json_to(command)
+        replies = await self.receive_messages(communicator, 0.2)
+
+        await communicator.disconnect()
+
+        self.assertEqual([reply["type"] for reply in replies], ["add_answer"])
+        self.assertEqual(
+            await UserAnswer.objects.filter(user_competition=enrollment).acount(), 1
+        )
+
+    async def test_current_question_revealed_after_reveal_time(self):
+        await sync_to_async(self.enroll_user)(self.user_profile, self.competition)
+        await sync_to_async(self.update_quiz_start_at)(
+            timezone.now() - timezone.timedelta(seconds=1)
+        )
+        user = await sync_to_async(get_user_from_token)(self.token)
+
+        communicator = await self.connect(user)
+        await communicator.send_json_to({"command": "GET_CURRENT_QUESTION"})
+        hidden = await communicator.receive_json_from()
+        await communicator.disconnect()
+
+        self.assertEqual(
+            [choice["isCorrect"] for choice in hidden["question"]["choices"]],
+            [None] * 4,
+        )
+
+        await sync_to_async(self.update_quiz_start_at)(
+            timezone.now() - timezone.timedelta(seconds=ANSWER_TIME_SECOND - 1)
+        )
+
+        communicator = await self.connect(user)
+        await communicator.send_json_to({"command": "GET_CURRENT_QUESTION"})
+        revealed = await communicator.receive_json_from()
+        await communicator.disconnect()
+
+        self.assertEqual(revealed["type"], "new_question")
+        self.assertEqual(revealed["question"]["number"], 1)
+        self.assertEqual(
+            sorted(choice["isCorrect"] for choice in revealed["question"]["choices"]),
+            [False, False, False, True],
+        )
+        self.assertEqual(revealed["question"]["totalParticipantsCount"], 1)
+
+    async def test_concurrent_hints_spend_each_hint_once(self):
+        enrollment = await sync_to_async(self.enroll_user)(
+            self.user_profile, self.competition
+        )
+        enrollment.hint_count = 2
+        await enrollment.asave(update_fields=["hint_count"])
+        await sync_to_async(self.update_quiz_start_at)(
+            timezone.now() - timezone.timedelta(seconds=1)
+        )
+        user = await sync_to_async(get_user_from_token)(self.token)
+        question = self.questions_list[0]
+
+        tabs = [await self.connect(user) for _ in range(4)]
+
+        hint = {"command": "GET_HINT", "args": {"question_id": question.pk}}
+
+        await asyncio.gather(
+            *(tab.send_json_to(hint) for tab in tabs for _ in range(2))
+        )
+
+        replies = [
+            await tab.receive_json_from(timeout=5) for tab in tabs for _ in range(2)
+        ]
+
+        for tab in tabs:
+            await tab.disconnect()
+
+        self.assertEqual(
+            sorted(reply["data"] or [] for reply in replies),
+            [[]] * 6 + [[choice.pk for choice in await self.get_hinted_choices()]] * 2,
+        )
+
+        await enrollment.arefresh_from_db()
+        self.assertEqual(enrollment.hint_count, 0)
+
+    async def get_hinted_choices(self):
+        return [
+            choice
+            async for choice in Choice.objects.filter(
+                question=self.questions_list[0], is_hinted_choice=True
+            ).order_by("id")
+        ]
+
+    async def test_time_sync(self):
+        await sync_to_async(self.update_quiz_start_at)(
+            timezone.now() + timezone.timedelta(minutes=1)
+        )
+
+        communicator = await self.connect(drain=False)
+
+        state = [await communicator.receive_json_from() for _ in range(5)]
+        self.assertEqual(
+            state[1]["data"],
+            {
+                "serverTime": state[1]["data"]["serverTime"],
+                "clientTime": None,
+                "startAt": self.competition.start_at.isoformat().replace(
+                    "+00:00", "Z"
+                ),
+                "answerTimeSeconds": ANSWER_TIME_SECOND,
+                "restTimeSeconds": REST_BETWEEN_EACH_QUESTION_SECOND,
+                "questionCount": 2,
+            },
+        )
+
+        client_time = int(timezone.now().timestamp() * 1000)
+
+        await communicator.send_json_to(
+            {"command": "TIME_SYNC", "args": {"clientTime": client_time}}
+        )
+        sync = await communicator.receive_json_from()
+
+        await communicator.disconnect()
+
+        self.assertEqual(sync["type"], "time_sync")
+        self.assertEqual(sync["data"]["clientTime"], client_time)
+        self.assertAlmostEqual(sync["data"]["serverTime"], client_time, delta=1000)
+
+    async def test_websocket_traffic_counted_per_message_type(self):
+        await websocket_traffic.aflush(force=True)
+        before = await sync_to_async(get_counters)("websocket_traffic")
+
+        communicator = await self.connect(drain=False)
+
+        state = [await communicator.receive_from() for _ in range(5)]
+
+        await communicator.send_json_to({"command": "PING"})
+        self.assertEqual(await communicator.receive_from(), "PONG")
+        await communicator.send_json_to({"command": "NOT_A_COMMAND"})
+        await communicator.receive_nothing(0.1)
+        await communicator.disconnect()
+
+        await websocket_traffic.aflush(force=True)
+        after = await sync_to_async(get_counters)("websocket_traffic")
+
+        def delta(field):
+            return after.get(field, 0) - before.get(field, 0)
+
+        self.assertEqual(delta("out_answers_history_messages"), 1)
+        self.assertEqual(delta("out_answers_history_bytes"), len(state[2].encode()))
+        self.assertEqual(delta("out_idle_bytes"), len(state[4].encode()))
+        self.assertEqual(delta("in_PING_messages"), 1)
+        self.assertEqual(delta("in_PING_bytes"), len(json.dumps({"command": "PING"})))
+        self.assertEqual(delta("in_unknown_messages"), 1)
+        self.assertEqual(delta("out_PONG_bytes"), len("PONG"))
+        self.assertNotIn("in_NOT_A_COMMAND_messages", after)
+
+    def test_executor_timings_buffered(self):
+        executor = InstrumentedThreadPoolExecutor("timings_test", 2)
+
+        for _ in range(3):
+            self.assertEqual(executor.submit(sum, [1, 2]).result(), 3)
+
+        self.assertEqual(
+            get_histogram("executor_timings_test_run_ms"),
+            {},
+            "Calls don't write to redis",
+        )
+
+        executor.timings.flush()
+        executor.shutdown()
+
+        self.assertEqual(get_histogram("executor_timings_test_run_ms")["count"], 3)
+        self.assertEqual(get_histogram("executor_timings_test_wait_ms")["count"], 3)
+
+    def test_deflate_compression_level(self):
+        offer = PerMessageDeflateOffer()
+        deflate = PerMessageDeflate.create_from_offer_accept(
+            True, accept_deflate([offer])
+        )
+        payload = json.dumps(
+            [{"questionNumber": number, "isCorrect": None} for number in range(200)]
+        ).encode()
+
+        def compress(level):
+            leveled = LeveledPerMessageDeflate.from_deflate(level, deflate)
+            leveled.start_compress_message()
+
+            return (
+                leveled.compress_message_data(payload) + leveled.end_compress_message()
+            )
+
+        self.assertLess(len(compress(9)), len(compress(0)))
+        self.assertLess(len(compress(9)), len(payload) / 5)
+
+        inflate = PerMessageDeflate(False, False, False, 0, 0, 0)
+        inflate.start_decompress_message()
+        self.assertEqual(inflate.decompress_message_data(compress(6)), payload)
+
+    async def test_driver_resumes_from_checkpoint(self):
+        channel_layer = InMemoryChannelLayer()
+        channel = await channel_layer.new_channel()
+        await channel_layer.group_add(f"quiz_{self.competition.pk}", channel)
+
+        crashed_driver = asyncio.create_task(self.create_driver(channel_layer, answer_seconds=0.3).run())
+
+        first_event = await channel_layer.receive(channel)
+        await asyncio.sleep(0.05)
+        crashed_driver.cancel()
+
+        with self.assertRaises(asyncio.CancelledError):
+            await crashed_driver
+
+        self.assertEqual(first_event["type"], "send_question")
+
+        await self.create_driver(channel_layer, answer_seconds=0.3).run()
+
+        events = await self.receive_events(channel_layer, channel)
+
+        self.assertEqual(
+            [event["type"] for event in events[:2]],
+            ["send_quiz_stats", "send_question"],
+            "The delivered question is not sent again",
+        )
+        self.assertEqual(events[1]["data"], 2)
+        self.assertEqual(events[-2]["type"], "finish_quiz")
+
+        await self.create_driver(channel_layer, answer_seconds=0.3).run()
+
+        self.assertEqual(
+            await self.receive_events(channel_layer, channel),
+            [],
+            "Finished competitions are not driven again",
+        )
+
+    async def test_scheduler_picks_up_unclaimed_running_competitions(self):
+        scheduler = RoundScheduler()
+        now = timezone.now()
+        pk = self.competition.pk
+
+        await Competition.objects.filter(pk=pk).aupdate(
+            start_at=now - timezone.timedelta(seconds=1),
+            end_at=now + timezone.timedelta(seconds=10),
+        )
+
+        self.assertEqual(await scheduler.get_competitions_to_drive(), [(pk, False)])
+        self.assertTrue(
+            await scheduler.should_drive(pk, False),
+            "Started without a driver, the scheduler was down at start_at",
+        )
+        self.assertFalse(
+            await scheduler.should_drive(pk, True),
+            "Ended competitions that were never driven are left alone",
+        )
+
+        await RoundCheckpoint(pk).mark(CLAIMED)
+
+        self.assertTrue(
+            await scheduler.should_drive(pk, True),
+            "The driver died in the warm up before publishing anything",
+        )
+
+    async def test_scheduler_computes_missing_end_at(self):
+        scheduler = RoundScheduler()
+        now = timezone.now()
+        pk = self.competition.pk
+
+        await Competition.objects.filter(pk=pk).aupdate(
+            start_at=now - timezone.timedelta(seconds=1), end_at=None
+        )
+
+        self.assertEqual(await scheduler.get_competitions_to_drive(), [(pk, False)])
+
+        await Competition.objects.filter(pk=pk).aupdate(
+            start_at=now - timezone.timedelta(hours=1), end_at=None
+        )
+
+        self.assertEqual(await scheduler.get_competitions_to_drive(), [(pk, True)])
+
 
 class QuizConsumerTestCase(TestCase):
 
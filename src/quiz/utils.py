@@ -1,10 +1,17 @@
-import math
+from django.core.cache import cache
 from django.utils import timezone
-from django.db.models import Count, Q
 from django.db.models.manager import BaseManager
 
 from authentication.models import UserProfile
 from quiz.constants import ANSWER_TIME_SECOND, REST_BETWEEN_EACH_QUESTION_SECOND
+from core.executor import run_in_sync_executor
+from core.utils import acache_get
+from quiz.eligibility import (
+    ELIMINATED,
+    NOT_ENROLLED,
+    get_user_progress,
+    progress_key,
+)
 from quiz.models import Competition, UserCompetition
 
 
@@ -13,78 +20,75 @@ def is_user_eligible_to_participate(
 ) -> bool:
     if not user_profile:
         return False
-    try:
-        user_competition = UserCompetition.objects.get(
-            user_profile=user_profile, competition=competition
+
+    progress = get_user_progress(user_profile.pk, competition.pk)
+
+    if progress == NOT_ENROLLED:
+        return False
+
+    if competition.start_at >= timezone.now():
+        return True
+
+    return is_progress_eligible(competition, progress)
+
+
+async def ais_user_eligible_to_participate(
+    user_profile: UserProfile | None, competition: Competition
+) -> bool:
+    """
+    Reads the index through the asyncio redis client, the sync check only
+    runs when the entry is missing from the cache.
+    """
+    if not user_profile:
+        return False
+
+    progress = await acache_get(progress_key(competition.pk, user_profile.pk))
+
+    if progress is None:
+        return await run_in_sync_executor(is_user_eligible_to_participate)(
+            user_profile, competition
         )
-    except UserCompetition.DoesNotExist:
+
+    if progress == NOT_ENROLLED:
         return False
 
     if competition.start_at >= timezone.now():
         return True
 
-    has_wrong_answer = user_competition.users_answer.filter(
-        selected_choice__is_correct=False
-    ).exists()
+    return is_progress_eligible(competition, progress)
+
+
+def is_progress_eligible(competition: Competition, progress: int):
+    now = timezone.now()
 
     if (
         competition.is_active is False
-        or competition.is_in_progress is False
-        or has_wrong_answer
+        or competition.clock.is_in_progress(now) is False
+        or progress == ELIMINATED
     ):
         return False
 
-    question_number = user_competition.users_answer.count()
-
-    state = get_quiz_question_state(competition) - 1
+    state = competition.clock.round_at(now) - 1
 
-    if state > question_number:
+    if state > progress:
         return False
 
     return True
 
 
 def get_quiz_question_state(competition: Competition):
+    return competition.clock.round_at(timezone.now())
 
-    start_at = competition.start_at
 
-    if timezone.is_naive(start_at):
-        start_at = timezone.make_aware(start_at, timezone.get_current_timezone())
-    else:
-        start_at = start_at.astimezone(timezone.get_current_timezone())
-
-    if start_at > timezone.now():
-        return 0
-
-    return min(
-        math.floor(
-            (timezone.now() - start_at).seconds
-            / (ANSWER_TIME_SECOND + REST_BETWEEN_EACH_QUESTION_SECOND)
-        )
-        + 1,
-        competition.questions.count(),
-    )
+def is_answer_revealed(competition: Competition, question_number: int):
+    """
+    Same as ``Question.answer_can_be_shown`` without loading the question.
+    """
+    return competition.clock.is_answer_revealed(question_number, timezone.now())
 
 
 def is_competition_finished(competition: Competition):
-    start_at = competition.start_at
-
-    if timezone.is_naive(start_at):
-        start_at = timezone.make_aware(start_at, timezone.get_current_timezone())
-    else:
-        start_at = start_at.astimezone(timezone.get_current_timezone())
-
-    if start_at > timezone.now():
-        return False
-
-    return (
-        math.floor(
-            (timezone.now() - start_at).seconds
-            / (ANSWER_TIME_SECOND + REST_BETWEEN_EACH_QUESTION_SECOND)
-        )
-        + 1
-        > competition.questions.count()
-    )
+    return competition.clock.is_finished(timezone.now())
 
 
 def get_round_participants(
@@ -95,26 +99,15 @@ def get_round_participants(
     if question_number <= 0:
         return total_participants.count()
 
-    total_questions = competition.questions.count()
+    total_questions = competition.question_count
     question_number = min(question_number, total_questions)
 
     if competition.is_finished:
         question_number += 1
 
-    return (
-        total_participants.annotate(
-            correct_answer_count=Count(
-                "users_answer",
-                filter=Q(users_answer__selected_choice__is_correct=True),
-            ),
-        )
-        .filter(
-            correct_answer_count__gte=question_number - 1,
-            # incorrect_answer_count=0,
-        )
-        .distinct()
-        .count()
-    )
+    return total_participants.filter(
+        correct_answer_count__gte=question_number - 1,
+    ).count()
 
 
 def get_previous_round_losses(
@@ -135,3 +128,65 @@ def get_previous_round_losses(
         - participating_count,
         0,
     )
+
+
+QUIZ_STATS_TIMEOUT = ANSWER_TIME_SECOND + REST_BETWEEN_EACH_QUESTION_SECOND
+
+
+def quiz_stats_key(competition_pk: int, question_number: int, is_finished: bool):
+    return f"quiz_{competition_pk}_stats_{question_number}_{int(is_finished)}"
+
+
+def calculate_quiz_stats(competition: Competition, question_number: int) -> dict:
+    prize_to_win = competition.prize_amount
+    users_participated = UserCompetition.objects.filter(competition=competition)
+
+    participating_count = get_round_participants(
+        competition, users_participated, question_number
+    )
+
+    return {
+        "users_participating": participating_count,
+        "prize_to_win": float(
+            prize_to_win
+            if competition.split_prize is False
+            else (
+                prize_to_win / participating_count if participating_count > 0 else 0
+            )
+        ),
+        "total_participants_count": users_participated.count(),
+        "questions_count": competition.question_count,
+        "previous_round_losses": get_previous_round_losses(
+            competition, users_participated, question_number
+        ),
+    }
+
+
+def get_quiz_stats(
+    competition: Competition, question_number: int | None = None, refresh=False
+) -> dict:
+    """
+    Round stats shared by every participant, calculated once per round and
+    kept in the cache. The per user ``hint_count`` is added by the consumers.
+    """
+    question_number = question_number or get_quiz_question_state(competition)
+
+    key = quiz_stats_key(
+        competition.pk, question_number, is_competition_finished(competition)
+    )
+
+    stats = None if refresh else cache.get(key)
+
+    if stats is None:
+        stats = calculate_quiz_stats(competition, question_number)
+        cache.set(key, stats, QUIZ_STATS_TIMEOUT)
+
+    return stats
+
+
+def get_winners_list(competition: Competition) -> list[dict]:
+    return list(
+        UserCompetition.objects.filter(is_winner=True, competition=competition)
+        .values("user_profile__wallet_address", "tx_hash")
+        .distinct()
+    )
@@ -1,4 +1,3 @@
-from typing import Any
 from rest_framework.generics import ListAPIView, ListCreateAPIView, RetrieveAPIView
 from rest_framework.permissions import IsAuthenticated
 
@@ -14,8 +13,6 @@ from quiz.serializers import (
     UserAnswerSerializer,
     UserCompetitionSerializer,
 )
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
 
 
 
@@ -45,17 +42,10 @@ class EnrollInCompetitionView(ListCreateAPIView):
 
     def perform_create(self, serializer: UserCompetitionSerializer):
         user = self.request.user.profile # type: ignore
+        # the quiz list sockets get the new participants count with the
+        # next flush of the enrollment counts
         serializer.save(user_profile=user)
 
-        competition: Any = serializer.validated_data.get("competition") 
-
-        channel_layer = get_channel_layer()
-
-        async_to_sync(channel_layer.group_send)(  # type: ignore
-            f"quiz_list",
-            {"type": "increase_enrollment", "data": competition.id},
-        )
-
 
     def get_queryset(self):
         return self.queryset.filter(user_profile=self.request.user.profile) # type:ignore
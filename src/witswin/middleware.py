@@ -1,21 +1,18 @@
 # middleware.py
 import base64
 from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
 
 from django.contrib.auth.models import AnonymousUser
-from rest_framework.authtoken.models import Token
 from channels.db import database_sync_to_async
 
+from authentication.utils import get_user_from_token
+
 
 @database_sync_to_async
 def get_user_from_basic_auth(tk: str):
     try:
-        token = Token.objects.filter(key=tk.strip().replace("'", "")).first()
-
-        if token is None:
-            return AnonymousUser()
-
-        return token.user
+        return get_user_from_token(tk.strip().replace("'", "")) or AnonymousUser()
     except Exception:
         return AnonymousUser()
 
@@ -35,6 +32,8 @@ class BasicTokenHeaderAuthentication:
         cookie = SimpleCookie()
 
         query_params = scope["query_string"].decode("utf-8")
+        # the websockets take other parameters than the token, e.g. ``seq``
+        query = parse_qs(query_params)
 
         print(query_params)
 
@@ -45,8 +44,8 @@ class BasicTokenHeaderAuthentication:
         if cookie.get("userToken") or cookie.get("ws_session"):
             scope["user"] = await get_user_from_basic_auth(cookie.get("userToken").value or cookie.get("ws_session").value)  # type: ignore
 
-        elif "auth" in query_params:
-            scope["user"] = await get_user_from_basic_auth(query_params.split("=")[1])
+        elif "auth" in query:
+            scope["user"] = await get_user_from_basic_auth(query["auth"][0])
         else:
             scope["user"] = AnonymousUser()
 
@@ -0,0 +1,104 @@
+"""
+Daphne with permessage-deflate on the websockets.
+
+The competition list and the answers history sent at connect are tens of KB
+of repetitive JSON per socket. Daphne doesn't negotiate compression, so this
+entry point enables it on its websocket factory. Messages smaller than
+``WEBSOCKET_DEFLATE_THRESHOLD`` bytes are sent uncompressed, deflate costs
+more than it saves on those.
+
+Takes the same arguments as daphne::
+
+    python -m witswin.server -b 0.0.0.0 -p 4444 witswin.asgi:application
+"""
+
+import zlib
+
+from autobahn.websocket.compress import (
+    PerMessageDeflate,
+    PerMessageDeflateOffer,
+    PerMessageDeflateOfferAccept,
+)
+from daphne.cli import CommandLineInterface
+from daphne.server import Server
+from daphne.ws_protocol import WebSocketProtocol
+from django.conf import settings
+
+
+class LeveledPerMessageDeflate(PerMessageDeflate):
+    """
+    autobahn always compresses with the zlib default level.
+    """
+
+    def __init__(self, level: int, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.level = level
+
+    @classmethod
+    def from_deflate(cls, level: int, deflate: PerMessageDeflate):
+        return cls(
+            level,
+            deflate._is_server,
+            deflate.server_no_context_takeover,
+            deflate.client_no_context_takeover,
+            deflate.server_max_window_bits,
+            deflate.client_max_window_bits,
+            deflate.mem_level,
+            deflate.max_message_size,
+        )
+
+    def start_compress_message(self):
+        if self._compressor is None or self.server_no_context_takeover:
+            self._compressor = zlib.compressobj(
+                self.level,
+                zlib.DEFLATED,
+                -self.server_max_window_bits,
+                self.mem_level,
+            )
+
+
+def accept_deflate(offers):
+    for offer in offers:
+        if isinstance(offer, PerMessageDeflateOffer):
+            return PerMessageDeflateOfferAccept(offer)
+
+    return None
+
+
+class DeflateWebSocketProtocol(WebSocketProtocol):
+    def onOpen(self):
+        if isinstance(self._perMessageCompress, PerMessageDeflate):
+            self._perMessageCompress = LeveledPerMessageDeflate.from_deflate(
+                settings.WEBSOCKET_DEFLATE_LEVEL, self._perMessageCompress
+            )
+
+        super().onOpen()
+
+    def sendMessage(self, payload, isBinary=False, *args, doNotCompress=False, **kwargs):
+        doNotCompress = doNotCompress or len(payload) < settings.WEBSOCKET_DEFLATE_THRESHOLD
+
+        super().sendMessage(payload, isBinary, *args, doNotCompress=doNotCompress, **kwargs)
+
+
+class DeflateServer(Server):
+    # daphne builds its websocket factory inside ``run``, it's set up as it's
+    # assigned, before the reactor starts accepting connections
+    @property
+    def ws_factory(self):
+        return self._ws_factory
+
+    @ws_factory.setter
+    def ws_factory(self, factory):
+        if settings.WEBSOCKET_DEFLATE_ENABLED:
+            factory.protocol = DeflateWebSocketProtocol
+            factory.setProtocolOptions(perMessageCompressionAccept=accept_deflate)
+
+        self._ws_factory = factory
+
+
+class DeflateCommandLineInterface(CommandLineInterface):
+    server_class = DeflateServer
+
+
+if __name__ == "__main__":
+    DeflateCommandLineInterface.entrypoint()
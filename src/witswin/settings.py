@@ -191,6 +191,54 @@ CHANNEL_LAYERS = {
     },
 }
 
+# seconds a resolved auth token is cached for, dropped earlier when it is rotated
+AUTH_TOKEN_CACHE_SECONDS = int(os.environ.get("AUTH_TOKEN_CACHE_SECONDS", 60))
+
+# connections of the asyncio redis client of each event loop
+ASYNC_REDIS_MAX_CONNECTIONS = int(os.environ.get("ASYNC_REDIS_MAX_CONNECTIONS", 64))
+
+# threads running the sync work left in the websocket consumers
+SYNC_EXECUTOR_WORKERS = int(os.environ.get("SYNC_EXECUTOR_WORKERS", 32))
+# the wait and run times of the executor calls are summed in memory and added
+# to redis at most once every this many seconds per process
+EXECUTOR_METRICS_FLUSH_SECONDS = float(
+    os.environ.get("EXECUTOR_METRICS_FLUSH_SECONDS", 10)
+)
+
+# "channel_layer" sends the competition events to every socket through the
+# channel layer, "hub" publishes them once per node with redis pub/sub
+QUIZ_BROADCAST_MODE = os.environ.get("QUIZ_BROADCAST_MODE", "channel_layer")
+
+# group events of a competition kept for the sockets resuming after a reconnect
+QUIZ_EVENT_STREAM_LENGTH = int(os.environ.get("QUIZ_EVENT_STREAM_LENGTH", 50))
+
+# "direct" stores every answer as it arrives, "write_behind" acknowledges answers
+# from the cached answer key and stores them in batches
+ANSWER_INGESTION_MODE = os.environ.get("ANSWER_INGESTION_MODE", "direct")
+ANSWER_INGESTION_BATCH_SIZE = int(os.environ.get("ANSWER_INGESTION_BATCH_SIZE", 500))
+
+# "service" drives the rounds with the run_round_scheduler command, "celery"
+# keeps driving each competition inside a celery worker
+ROUND_SCHEDULER_BACKEND = os.environ.get("ROUND_SCHEDULER_BACKEND", "service")
+ROUND_SCHEDULER_POLL_SECONDS = float(os.environ.get("ROUND_SCHEDULER_POLL_SECONDS", 1))
+ROUND_SCHEDULER_LOOKAHEAD_SECONDS = float(
+    os.environ.get("ROUND_SCHEDULER_LOOKAHEAD_SECONDS", 60)
+)
+COMPETITION_WARM_UP_SECONDS = 10
+ROUND_DRIVER_LEASE_SECONDS = int(os.environ.get("ROUND_DRIVER_LEASE_SECONDS", 5))
+
+# permessage-deflate of the websockets served by witswin.server, messages
+# smaller than the threshold (in bytes) are sent uncompressed
+WEBSOCKET_DEFLATE_ENABLED = not os.environ.get("WEBSOCKET_DEFLATE_DISABLED")
+WEBSOCKET_DEFLATE_LEVEL = int(os.environ.get("WEBSOCKET_DEFLATE_LEVEL", 6))
+WEBSOCKET_DEFLATE_THRESHOLD = int(os.environ.get("WEBSOCKET_DEFLATE_THRESHOLD", 512))
+
+# the websocket byte counters are summed in memory and added to redis at most
+# once every this many seconds per process
+WEBSOCKET_METRICS_FLUSH_SECONDS = float(
+    os.environ.get("WEBSOCKET_METRICS_FLUSH_SECONDS", 10)
+)
+
 CSRF_TRUSTED_ORIGINS = [
     "https://wits-backend-production.up.railway.app",
     "http://localhost:4444",
@@ -216,12 +264,12 @@ CACHES = {
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "authentication.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
     "DEFAULT_RENDERER_CLASSES": (
-        "djangorestframework_camel_case.render.CamelCaseJSONRenderer",
+        "core.renderers.CamelCaseORJSONRenderer",
         "djangorestframework_camel_case.render.CamelCaseBrowsableAPIRenderer",
     ),
     "DEFAULT_PARSER_CLASSES": (
@@ -241,6 +289,18 @@ CELERY_BEAT_SCHEDULER = os.environ.get(
     "CELERY_BEAT_SCHEDULER", default="django_celery_beat.schedulers.DatabaseScheduler"
 )
 
+# seconds between two participants counts broadcasts to the quiz list sockets
+ENROLLMENT_COUNTS_FLUSH_SECONDS = float(
+    os.environ.get("ENROLLMENT_COUNTS_FLUSH_SECONDS", 2)
+)
+
+CELERY_BEAT_SCHEDULE = {
+    "flush_enrollment_counts": {
+        "task": "quiz.tasks.flush_enrollment_counts",
+        "schedule": ENROLLMENT_COUNTS_FLUSH_SECONDS,
+    },
+}
+
 
 # Email Config
 
@@ -1,3 +1,3 @@
 pypy3 manage.py migrate
 
-pypy3 -m daphne -b 0.0.0.0 -p ${PORT:-5000} witswin.asgi:application
\ No newline at end of file
+pypy3 -m witswin.server -b 0.0.0.0 -p ${PORT:-5000} witswin.asgi:application
\ No newline at end of file